@@ -58,6 +58,15 @@ def experiment():
                          help='Initial size of the replay memory.')
     arg_mem.add_argument("--max-replay-size", type=int, default=500000,
                          help='Max size of the replay memory.')
+    arg_mem.add_argument("--prioritized", action='store_true',
+                         help='Whether to use the prioritized replay memory.')
+    arg_mem.add_argument("--replay-path", type=str,
+                         help='Directory where to store the replay memory on '
+                              'disk. If it already contains a memory, it is '
+                              'reopened.')
+    arg_mem.add_argument("--replay-save-frequency", type=int, default=1000,
+                         help='Number of fits between each save of the '
+                              'replay memory stored on disk.')
 
     arg_net = parser.add_argument_group('Deep Q-Network')
     arg_net.add_argument("--optimizer",
@@ -86,6 +95,9 @@ def experiment():
     arg_alg.add_argument("--n-approximators", type=int, default=1,
                          help="Number of approximators used in the ensemble"
                               "for Weighted DQN and Averaged DQN.")
+    arg_alg.add_argument("--n-step", type=int, default=1,
+                         help='Number of steps of the returns used to compute '
+                              'the targets.')
     arg_alg.add_argument("--batch-size", type=int, default=32,
                          help='Batch size for each fit of the network.')
     arg_alg.add_argument("--history-length", type=int, default=4,
@@ -99,6 +111,9 @@ def experiment():
     arg_alg.add_argument("--train-frequency", type=int, default=4,
                          help='Number of learning steps before each fit of the'
                               'neural network.')
+    arg_alg.add_argument("--n-updates-per-fit", type=int, default=1,
+                         help='Number of updates of the neural network at '
+                              'each fit.')
     arg_alg.add_argument("--max-steps", type=int, default=50000000,
                          help='Total number of learning steps.')
     arg_alg.add_argument("--final-exploration-frame", type=int, default=1000000,
@@ -251,8 +266,13 @@ def experiment():
             initial_replay_size=initial_replay_size,
             max_replay_size=max_replay_size,
             history_length=args.history_length,
+            n_step=args.n_step,
             train_frequency=train_frequency,
+            n_updates_per_fit=args.n_updates_per_fit,
             target_update_frequency=target_update_frequency,
+            prioritized_replay=args.prioritized,
+            replay_memory_path=args.replay_path,
+            replay_memory_save_frequency=args.replay_save_frequency,
             max_no_op_actions=args.max_no_op_actions,
             no_op_action_value=args.no_op_action_value
         )
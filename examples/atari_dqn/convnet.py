@@ -3,12 +3,20 @@ import tensorflow as tf
 
 
 class ConvNet:
+    _shared_session = None
+
     def __init__(self, name=None, folder_name=None, load_path=None,
                  **convnet_pars):
         self._name = name
         self._folder_name = folder_name
 
-        self._session = tf.Session()
+        # All the networks share a session, so that the members of an ensemble
+        # can be evaluated in a single run.
+        if ConvNet._shared_session is None or\
+                ConvNet._shared_session.graph is not tf.get_default_graph():
+            ConvNet._shared_session = tf.Session()
+        self._session = ConvNet._shared_session
+        self._sync_ops = dict()
 
         if load_path is not None:
             self._load(load_path)
@@ -38,12 +46,15 @@ class ConvNet:
         else:
             return self._session.run(self._features, feed_dict={self._x: s})
 
-    def fit(self, s, a, q):
+    def fit(self, s, a, q, weights=None):
+        if weights is None:
+            weights = np.ones(q.shape[0])
         summaries, _ = self._session.run(
             [self._merged, self._train_step],
             feed_dict={self._x: s,
                        self._action: a.ravel().astype(np.uint8),
-                       self._target_q: q}
+                       self._target_q: q,
+                       self._weights: weights}
         )
         if hasattr(self, '_train_writer'):
             self._train_writer.add_summary(summaries, self._train_count)
@@ -59,6 +70,20 @@ class ConvNet:
             self._session.run(self._w[i],
                               feed_dict={self._target_w[i]: weights[i]})
 
+    def sync_from(self, other):
+        if other._scope_name not in self._sync_ops:
+            w = tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES,
+                                  scope=self._scope_name)
+            other_w = tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES,
+                                        scope=other._scope_name)
+            assert len(w) == len(other_w)
+
+            with tf.variable_scope(self._scope_name):
+                self._sync_ops[other._scope_name] = tf.group(
+                    *[w[i].assign(other_w[i]) for i in xrange(len(w))])
+
+        self._session.run(self._sync_ops[other._scope_name])
+
     def get_weights(self, only_trainable=False):
         if not only_trainable:
             w = tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES,
@@ -69,6 +94,13 @@ class ConvNet:
 
         return self._session.run(w)
 
+    @staticmethod
+    def predict_ensemble(models, s, features=False):
+        outputs = [m._features if features else m.q for m in models]
+        feed_dict = dict([(m._x, s) for m in models])
+
+        return models[0]._session.run(outputs, feed_dict=feed_dict)
+
     def save(self):
         self._train_saver.save(
             self._session,
@@ -128,6 +160,7 @@ class ConvNet:
 
             self._target_q = tf.placeholder('float32', [None], name='target_q')
             self._action = tf.placeholder('uint8', [None], name='action')
+            self._weights = tf.placeholder('float32', [None], name='weights')
 
             action_one_hot = tf.one_hot(self._action,
                                         convnet_pars['output_shape'][0],
@@ -136,7 +169,8 @@ class ConvNet:
                                           axis=1,
                                           name='q_acted')
 
-            loss = tf.losses.huber_loss(self._target_q, self._q_acted)
+            loss = tf.losses.huber_loss(self._target_q, self._q_acted,
+                                        weights=self._weights)
             tf.summary.scalar('huber_loss', loss)
             tf.summary.scalar('average_q', tf.reduce_mean(self.q))
             self._merged = tf.summary.merge(
@@ -190,6 +224,7 @@ class ConvNet:
         tf.add_to_collection(self._scope_name + '_q', self.q)
         tf.add_to_collection(self._scope_name + '_target_q', self._target_q)
         tf.add_to_collection(self._scope_name + '_q_acted', self._q_acted)
+        tf.add_to_collection(self._scope_name + '_weights', self._weights)
         tf.add_to_collection(self._scope_name + '_merged', self._merged)
         tf.add_to_collection(self._scope_name + '_train_step', self._train_step)
 
@@ -200,6 +235,7 @@ class ConvNet:
         self.q = tf.get_collection(self._scope_name + '_q')[0]
         self._target_q = tf.get_collection(self._scope_name + '_target_q')[0]
         self._q_acted = tf.get_collection(self._scope_name + '_q_acted')[0]
+        self._weights = tf.get_collection(self._scope_name + '_weights')[0]
         self._merged = tf.get_collection(self._scope_name + '_merged')[0]
         self._train_step = tf.get_collection(
             self._scope_name + '_train_step')[0]
@@ -1,9 +1,16 @@
+import numpy as np
+
+
 class Agent(object):
     """
     This class implements the functions to manage the agent (e.g. move the agent
     following its policy).
 
     """
+    # Attributes depending on the current episode, e.g. the action already
+    # chosen by on-policy algorithms or the eligibility traces.
+    _episode_attributes = ['_next_action']
+
     def __init__(self, policy, mdp_info, params, features=None):
         """
         Constructor.
@@ -57,6 +64,29 @@ class Agent(object):
 
             return action
 
+    def draw_actions(self, states):
+        """
+        Return the actions to execute in a batch of states. The batch is
+        forwarded to the policy in a single call when the policy supports it,
+        otherwise `draw_action` is called on each state.
+
+        Args:
+            states (np.ndarray): the states where the agent is, stacked along
+                the first axis.
+
+        Returns:
+            The actions to be executed, stacked along the first axis.
+
+        """
+        if self._next_action is not None or not hasattr(self.policy,
+                                                        'draw_actions'):
+            return np.array([self.draw_action(s) for s in states])
+
+        if self.phi is not None:
+            states = self.phi(states)
+
+        return self.policy.draw_actions(states)
+
     def episode_start(self):
         """
         Reset some parameters when a new episode starts. It is used only by
@@ -64,3 +94,36 @@ class Agent(object):
 
         """
         pass
+
+    def get_episode_state(self):
+        """
+        Returns:
+            The attributes of the agent depending on the current episode. They
+            are used to move the agent in several episodes at once (e.g. by
+            `VectorCore`), restoring the ones of each episode with
+            `set_episode_state`.
+
+        """
+        return dict((k, getattr(self, k)) for k in self._episode_attributes)
+
+    def set_episode_state(self, episode_state):
+        """
+        Restore the attributes of the agent depending on the current episode.
+
+        Args:
+            episode_state (dict): the attributes returned by
+                `get_episode_state`.
+
+        """
+        for k, v in episode_state.items():
+            setattr(self, k, v)
+
+    @property
+    def next_action(self):
+        """
+        Returns:
+            The action already chosen by the algorithm for the next step (e.g.
+            in the case of SARSA), or None.
+
+        """
+        return self._next_action
@@ -3,10 +3,11 @@ from .dqn import DQN, DoubleDQN, AveragedDQN, WeightedDQN
 from .td import QLearning, DoubleQLearning, WeightedQLearning, SpeedyQLearning,\
     RLearning, RQLearning, SARSA, SARSALambdaDiscrete, SARSALambdaContinuous,\
     ExpectedSARSA, TrueOnlineSARSALambda
+from .vectorized_td import VectorizedTD
 
 
 __all__ = ['FQI', 'DoubleFQI', 'WeightedFQI', 'LSPI', 'DQN', 'DoubleDQN',
            'WeightedDQN', 'AveragedDQN', 'QLearning', 'DoubleQLearning',
            'WeightedQLearning', 'SpeedyQLearning', 'RLearning', 'RQLearning',
            'SARSA', 'SARSALambdaDiscrete', 'SARSALambdaContinuous',
-           'ExpectedSARSA', 'TrueOnlineSARSALambda']
+           'ExpectedSARSA', 'TrueOnlineSARSALambda', 'VectorizedTD']
@@ -1,11 +1,14 @@
+from inspect import getargspec
+
 import numpy as np
+from sklearn.ensemble import BaseEnsemble, GradientBoostingRegressor
 from tqdm import trange
 
 from mushroom.algorithms.agent import Agent
 from mushroom.approximators import Regressor
 from mushroom.approximators.parametric import LinearApproximator
 from mushroom.features import get_action_features
-from mushroom.utils.dataset import parse_dataset
+from mushroom.utils.dataset import HDF5Dataset, parse_dataset
 
 
 class BatchTD(Agent):
@@ -37,14 +40,49 @@ class FQI(BatchTD):
     Fitted Q-Iteration algorithm.
     "Tree-Based Batch Mode Reinforcement Learning", Ernst D. et al.. 2005.
 
+    With `warm_start`, the models are created with `warm_start=True` and
+    refined at each iteration, instead of being fitted from scratch. This is
+    meant for scikit-learn models that support it: iterative models, e.g.
+    `MLPRegressor`, resume from the weights of the previous iteration, while
+    the number of stages of `GradientBoostingRegressor` is increased by
+    `n_estimators_increment` at each iteration, so that only the new stages
+    are fitted, on the residual of the new targets with respect to the
+    current model. Averaging ensembles, e.g. `ExtraTreesRegressor`, cannot be
+    warm started, since their new trees would be averaged with the ones
+    fitted on the old targets.
+
+    If the dataset is an `HDF5Dataset`, FQI runs out of core: the samples are
+    read from disk in chunks of `chunk_size` samples and the model is updated
+    with `partial_fit`, so that only a chunk and the targets are kept in
+    memory. This requires a model supporting `partial_fit`, e.g.
+    `SGDRegressor` or `MLPRegressor`, but not `ExtraTreesRegressor`, and it
+    is not available for boosted FQI and `DoubleFQI`.
+
     """
     def __init__(self, approximator, policy, mdp_info, params):
+        alg_params = params['algorithm_params']
+
+        # "Boosted Fitted Q-Iteration". Tosatto S. et al.. 2017.
+        self._boosted = alg_params.get('boosted', False)
+
+        self._warm_start = alg_params.get('warm_start', False)
+        if self._warm_start:
+            self._check_warm_start(approximator)
+            params['approximator_params']['warm_start'] = True
+            self._n_estimators = params['approximator_params'].get(
+                'n_estimators')
+            self._n_estimators_increment = alg_params.get(
+                'n_estimators_increment', self._n_estimators)
+
+        self._chunk_size = alg_params.get('chunk_size', 100000)
+        self._n_epochs = alg_params.get('n_epochs', 1)
+        self._partial_fit = hasattr(approximator, 'partial_fit')
+        self._out_of_core = not self._boosted
+
         super(FQI, self).__init__(approximator, policy, mdp_info, params)
 
         self._target = None
 
-        # "Boosted Fitted Q-Iteration". Tosatto S. et al.. 2017.
-        self._boosted = params['algorithm_params'].get('boosted', False)
         if self._boosted:
             self._prediction = 0.
             self._next_q = 0.
@@ -62,6 +100,19 @@ class FQI(BatchTD):
             Last target computed.
 
         """
+        if isinstance(dataset, HDF5Dataset):
+            if not self._out_of_core:
+                raise ValueError('Boosted FQI and DoubleFQI cannot be run out'
+                                 ' of core.')
+            if not self._partial_fit:
+                raise ValueError('The approximator does not support'
+                                 ' partial_fit, it cannot be fitted out of'
+                                 ' core.')
+
+            self._fit_out_of_core(dataset)
+
+            return
+
         if self._boosted:
             if self._target is None:
                 self._prediction = 0.
@@ -71,25 +122,131 @@ class FQI(BatchTD):
         else:
             fit = self._fit
 
+        x = self._parse(dataset)
+        for _ in trange(self._n_iterations, dynamic_ncols=True,
+                        disable=self._quiet, leave=False):
+            if self._warm_start and self._target is not None:
+                self._grow()
+            fit(x)
+
+    def _check_warm_start(self, approximator):
+        """
+        Check that the models can be warm started.
+
+        Args:
+            approximator (object): the approximator class.
+
+        """
+        if self._boosted:
+            raise ValueError('Boosted FQI fits a new model at each iteration,'
+                             ' it cannot be warm started.')
+
+        try:
+            args = getargspec(approximator.__init__).args
+        except TypeError:
+            args = list()
+        if 'warm_start' not in args:
+            raise ValueError('The approximator does not support warm start.')
+
+        if issubclass(approximator, BaseEnsemble) and not issubclass(
+                approximator, GradientBoostingRegressor):
+            raise ValueError('Only boosting ensembles can be warm started: the'
+                             ' new estimators of averaging ensembles would be'
+                             ' averaged with the ones fitted on the old'
+                             ' targets.')
+
+    def _grow(self):
+        """
+        Increase the number of estimators of the warm started models, so that
+        the next fit adds new estimators to the ones already fitted.
+
+        """
+        if self._n_estimators is not None:
+            self._n_estimators += self._n_estimators_increment
+            self.approximator.set_params(n_estimators=self._n_estimators)
+
+    def _fit_out_of_core(self, dataset):
+        """
+        Fit loop on a dataset stored on disk. At each iteration, the targets
+        are computed chunk by chunk with the model of the previous iteration;
+        then, the model is updated with `partial_fit` on each chunk, for
+        `n_epochs` passes over the dataset visiting the chunks in random
+        order.
+
+        Args:
+            dataset (HDF5Dataset): the dataset.
+
+        """
+        chunks = dataset.chunks(self._chunk_size)
+        target = np.empty(len(dataset))
+
         for _ in trange(self._n_iterations, dynamic_ncols=True,
                         disable=self._quiet, leave=False):
-            fit(dataset)
+            for start, stop in chunks:
+                reward = dataset.reward[start:stop]
+                if self._target is None:
+                    target[start:stop] = reward
+                else:
+                    next_state = dataset.next_state[start:stop].astype(
+                        np.float)
+                    absorbing = dataset.absorbing[start:stop]
+
+                    q = self.approximator.predict(next_state)
+                    if np.any(absorbing):
+                        q *= 1 - absorbing.reshape(-1, 1)
+
+                    max_q = np.max(q, axis=1)
+                    target[start:stop] = reward + self.mdp_info.gamma * max_q
+            self._target = target
+
+            for _ in xrange(self._n_epochs):
+                for i in np.random.permutation(len(chunks)):
+                    start, stop = chunks[i]
+                    state = dataset.state[start:stop].astype(np.float)
+                    action = dataset.action[start:stop]
+
+                    self.approximator.partial_fit(state, action,
+                                                  target[start:stop],
+                                                  **self.params['fit_params'])
+
+    @staticmethod
+    def _parse(dataset):
+        """
+        Parse the dataset, once for all the iterations of a fit.
+
+        Args:
+            dataset (list): the dataset.
+
+        Returns:
+            A tuple containing state, action, reward, next state and the mask
+            of the non-absorbing next states. The mask is None if no next state
+            is absorbing.
+
+        """
+        state, action, reward, next_state, absorbing, _ = parse_dataset(
+            dataset)
+        if np.any(absorbing):
+            not_absorbing = 1 - absorbing.reshape(-1, 1)
+        else:
+            not_absorbing = None
+
+        return state, action, reward, next_state, not_absorbing
 
     def _fit(self, x):
         """
         Single fit iteration.
 
         Args:
-            x (list): the dataset.
+            x (tuple): the parsed dataset.
 
         """
-        state, action, reward, next_state, absorbing, _ = parse_dataset(x)
+        state, action, reward, next_state, not_absorbing = x
         if self._target is None:
             self._target = reward
         else:
             q = self.approximator.predict(next_state)
-            if np.any(absorbing):
-                q *= 1 - absorbing.reshape(-1, 1)
+            if not_absorbing is not None:
+                q *= not_absorbing
 
             max_q = np.max(q, axis=1)
             self._target = reward + self.mdp_info.gamma * max_q
@@ -102,17 +259,18 @@ class FQI(BatchTD):
         Single fit iteration for boosted FQI.
 
         Args:
-            x (list): the dataset.
+            x (tuple): the parsed dataset.
 
         """
-        state, action, reward, next_state, absorbing, _ = parse_dataset(x)
+        state, action, reward, next_state, not_absorbing = x
         if self._target is None:
-            self._target = reward
+            # The target is updated in place, so the cached rewards are copied.
+            self._target = reward.copy()
         else:
             self._next_q += self.approximator.predict(next_state,
                                                       idx=self._idx - 1)
-            if np.any(absorbing):
-                self._next_q *= 1 - absorbing.reshape(-1, 1)
+            if not_absorbing is not None:
+                self._next_q *= not_absorbing
 
             max_q = np.max(self._next_q, axis=1)
             self._target = reward + self.mdp_info.gamma * max_q
@@ -137,29 +295,37 @@ class DoubleFQI(FQI):
         params['approximator_params']['n_models'] = 2
         super(DoubleFQI, self).__init__(approximator, policy, mdp_info, params)
 
-    def _fit(self, x):
-        state = list()
-        action = list()
-        reward = list()
-        next_state = list()
-        absorbing = list()
+        self._out_of_core = False
 
-        half = len(x) / 2
-        for i in xrange(2):
-            s, a, r, ss, ab, _ = parse_dataset(x[i * half:(i + 1) * half])
-            state.append(s)
-            action.append(a)
-            reward.append(r)
-            next_state.append(ss)
-            absorbing.append(ab)
+    @staticmethod
+    def _parse(dataset):
+        """
+        Parse each half of the dataset, once for all the iterations of a fit.
+
+        Args:
+            dataset (list): the dataset.
+
+        Returns:
+            A tuple containing the lists of the states, actions, rewards, next
+            states and masks of the non-absorbing next states of the two halves
+            of the dataset.
+
+        """
+        half = len(dataset) / 2
+
+        return tuple(zip(*[FQI._parse(dataset[i * half:(i + 1) * half])
+                           for i in xrange(2)]))
+
+    def _fit(self, x):
+        state, action, reward, next_state, not_absorbing = x
 
         if self._target is None:
-            self._target = reward
+            self._target = list(reward)
         else:
             for i in xrange(2):
                 q_i = self.approximator.predict(next_state[i], idx=i)
-                if np.any(absorbing[i]):
-                    q_i *= 1 - absorbing[i].reshape(-1, 1)
+                if not_absorbing[i] is not None:
+                    q_i *= not_absorbing[i]
 
                 amax_q = np.expand_dims(np.argmax(q_i, axis=1), axis=1)
                 max_q = self.approximator.predict(next_state[i], amax_q,
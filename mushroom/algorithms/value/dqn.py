@@ -4,7 +4,8 @@ import numpy as np
 
 from mushroom.algorithms.agent import Agent
 from mushroom.approximators.regressor import Ensemble, Regressor
-from mushroom.utils.replay_memory import Buffer, ReplayMemory
+from mushroom.utils.replay_memory import Buffer, ReplayMemory,\
+    MemmapReplayMemory, PrefetchReplayMemory, PrioritizedReplayMemory
 
 
 class DQN(Agent):
@@ -20,20 +21,59 @@ class DQN(Agent):
         self._n_approximators = alg_params.get('n_approximators', 1)
         self._clip_reward = alg_params.get('clip_reward', True)
         self._train_frequency = alg_params.get('train_frequency')
+        self._n_updates_per_fit = alg_params.get('n_updates_per_fit', 1)
         self._target_update_frequency = alg_params.get(
             'target_update_frequency')
         self._max_no_op_actions = alg_params.get('max_no_op_actions', 0)
         self._no_op_action_value = alg_params.get('no_op_action_value', 0)
-
-        self._replay_memory = ReplayMemory(
-            mdp_info,
-            alg_params.get('initial_replay_size'),
-            alg_params.get('max_replay_size'),
-            alg_params.get('history_length', 1)
-        )
+        self._n_step = alg_params.get('n_step', 1)
+
+        self._prioritized_replay = alg_params.get('prioritized_replay',
+                                                  False)
+        if self._prioritized_replay and alg_params.get(
+                'replay_memory_path') is not None:
+            raise ValueError('The prioritized replay memory cannot be stored'
+                             ' on disk.')
+        if alg_params.get('replay_memory') is not None:
+            self._replay_memory = alg_params.get('replay_memory')
+        elif self._prioritized_replay:
+            self._replay_memory = PrioritizedReplayMemory(
+                mdp_info,
+                alg_params.get('initial_replay_size'),
+                alg_params.get('max_replay_size'),
+                alg_params.get('history_length', 1),
+                self._n_step,
+                self._clip_reward,
+                alpha=alg_params.get('priority_exponent', .6),
+                beta=alg_params.get('importance_sampling_exponent')
+            )
+        elif alg_params.get('replay_memory_path') is not None:
+            self._replay_memory = MemmapReplayMemory(
+                mdp_info,
+                alg_params.get('initial_replay_size'),
+                alg_params.get('max_replay_size'),
+                alg_params.get('replay_memory_path'),
+                alg_params.get('history_length', 1),
+                self._n_step,
+                self._clip_reward,
+                alg_params.get('replay_memory_save_frequency', 1000)
+            )
+        else:
+            self._replay_memory = ReplayMemory(
+                mdp_info,
+                alg_params.get('initial_replay_size'),
+                alg_params.get('max_replay_size'),
+                alg_params.get('history_length', 1),
+                self._n_step,
+                self._clip_reward
+            )
+        if alg_params.get('prefetch_batches', 0) > 0:
+            self._replay_memory = PrefetchReplayMemory(
+                self._replay_memory, alg_params.get('prefetch_batches'))
         self._buffer = Buffer(size=alg_params.get('history_length', 1))
 
         self._n_updates = 0
+        self._n_samples = 0
         self._episode_steps = 0
         self._no_op_actions = None
 
@@ -48,32 +88,76 @@ class DQN(Agent):
         policy.set_q(self.approximator)
 
         if self._n_approximators == 1:
-            self.target_approximator.model.set_weights(
-                self.approximator.model.get_weights())
+            self._sync(self.target_approximator.model, self.approximator.model)
         else:
             for i in xrange(self._n_approximators):
-                self.target_approximator.model[i].set_weights(
-                    self.approximator.model.get_weights())
+                self._sync(self.target_approximator.model[i],
+                           self.approximator.model)
 
         super(DQN, self).__init__(policy, mdp_info, params)
 
     def fit(self, dataset):
+        """
+        Add the samples to the replay memory and, once it is initialized, run
+        `n_updates_per_fit` updates every `train_frequency` samples. If
+        `train_frequency` is not provided, the updates are run at each call.
+
+        Args:
+            dataset (list): the samples to add to the replay memory.
+
+        """
         self._replay_memory.add(dataset)
+
+        n_samples = self._n_samples + len(dataset)
+        if self._train_frequency is None:
+            n_trainings = 1
+        else:
+            n_trainings = n_samples // self._train_frequency -\
+                self._n_samples // self._train_frequency
+        self._n_samples = n_samples
+
         if self._replay_memory.initialized:
-            state, action, reward, next_state, absorbing, _ =\
-                self._replay_memory.get(self._batch_size)
+            for _ in xrange(n_trainings * self._n_updates_per_fit):
+                self.fit_batch()
 
-            if self._clip_reward:
-                reward = np.clip(reward, -1, 1)
+    def fit_batch(self):
+        """
+        Run a single update of the approximator on a batch sampled from the
+        replay memory and update the target network, if needed.
 
-            q_next = self._next_q(next_state, absorbing)
-            q = reward + self.mdp_info.gamma * q_next
+        """
+        batch = self._replay_memory.get(self._batch_size)
+        state, action, reward, next_state, absorbing, _ = batch[:6]
+        batch = batch[6:]
+
+        # The n-step returns are computed by the memory from the clipped
+        # rewards.
+        if self._clip_reward and self._n_step == 1:
+            reward = np.clip(reward, -1, 1)
+
+        if self._n_step > 1:
+            gamma = self.mdp_info.gamma ** batch[0]
+            batch = batch[1:]
+        else:
+            gamma = self.mdp_info.gamma
 
-            self.approximator.fit(state, action, q, **self.params['fit_params'])
+        q_next = self._next_q(next_state, absorbing)
+        q = reward + gamma * q_next
 
-            self._n_updates += 1
+        if self._prioritized_replay:
+            idxs, weights = batch
+            td_error = q - self.approximator.predict(state, action)
+            self._replay_memory.update(idxs, td_error)
 
-            self._update_target()
+            self.approximator.fit(state, action, q, weights=weights,
+                                  **self.params['fit_params'])
+        else:
+            self.approximator.fit(state, action, q,
+                                  **self.params['fit_params'])
+
+        self._n_updates += 1
+
+        self._update_target()
 
     def _update_target(self):
         """
@@ -82,8 +166,24 @@ class DQN(Agent):
 
         """
         if self._n_updates % self._target_update_frequency == 0:
-            self.target_approximator.model.set_weights(
-                self.approximator.model.get_weights())
+            self._sync(self.target_approximator.model, self.approximator.model)
+
+    @staticmethod
+    def _sync(target, model):
+        """
+        Copy the weights of a model in a target model. The copy is done
+        directly by the models if both provide `sync_from`, otherwise the
+        weights are moved through numpy arrays.
+
+        Args:
+            target (object): the model to update;
+            model (object): the model to copy.
+
+        """
+        if hasattr(target, 'sync_from') and hasattr(model, 'sync_from'):
+            target.sync_from(model)
+        else:
+            target.set_weights(model.get_weights())
 
     def _next_q(self, next_state, absorbing):
         """
@@ -118,6 +218,11 @@ class DQN(Agent):
 
         return action
 
+    def draw_actions(self, states):
+        raise NotImplementedError('The frame history and the no-op actions of'
+                                  ' DQN are tracked for a single episode at a'
+                                  ' time.')
+
     def episode_start(self):
         self._no_op_actions = np.random.randint(
             self._buffer.size, self._max_no_op_actions + 1)
@@ -159,16 +264,15 @@ class AveragedDQN(DQN):
         if self._n_updates % self._target_update_frequency == 0:
             idx = self._n_updates / self._target_update_frequency\
                   % self._n_approximators
-            self.target_approximator.model[idx].set_weights(
-                self.approximator.model.get_weights())
+            self._sync(self.target_approximator.model[idx],
+                       self.approximator.model)
 
             if self._n_fitted_target_models < self._n_approximators:
                 self._n_fitted_target_models += 1
 
     def _next_q(self, next_state, absorbing):
-        q = list()
-        for idx in xrange(self._n_fitted_target_models):
-            q.append(self.target_approximator.predict(next_state, idx=idx))
+        q = self.target_approximator.predict(
+            next_state, idx=range(self._n_fitted_target_models))
         q = np.mean(q, axis=0)
         if np.any(absorbing):
             q *= 1 - absorbing.reshape(-1, 1)
@@ -182,21 +286,21 @@ class WeightedDQN(AveragedDQN):
 
     """
     def _next_q(self, next_state, absorbing):
-        samples = np.ones((self._n_fitted_target_models,
-                           next_state.shape[0],
-                           self.mdp_info.action_space.n))
-        for i in xrange(self._n_fitted_target_models):
-            samples[i] = self.target_approximator.predict(next_state,
-                                                          idx=i)
-        W = np.zeros(next_state.shape[0])
-        for i in xrange(next_state.shape[0]):
-            means = np.mean(samples[:, i, :], axis=0)
-            max_idx = np.argmax(samples[:, i, :], axis=1)
-            max_idx, max_count = np.unique(max_idx, return_counts=True)
-            count = np.zeros(self.mdp_info.action_space.n)
-            count[max_idx] = max_count
-            w = count / float(self._n_fitted_target_models)
-            W[i] = np.dot(w, means)
+        n_samples = next_state.shape[0]
+        n_actions = self.mdp_info.action_space.n
+        samples = np.array(self.target_approximator.predict(
+            next_state, idx=range(self._n_fitted_target_models)),
+            dtype=np.float)
+
+        max_idx = np.argmax(samples, axis=2)
+        max_idx += np.arange(n_samples) * n_actions
+        count = np.bincount(max_idx.ravel(), minlength=n_samples * n_actions)
+
+        means = np.mean(samples, axis=0)
+        w = count.reshape(n_samples, n_actions) / float(
+            self._n_fitted_target_models)
+
+        W = np.einsum('ij,ij->i', w, means)
 
         if np.any(absorbing):
             W *= 1 - absorbing
@@ -1,10 +1,10 @@
 import numpy as np
 from copy import deepcopy
+from scipy.special import ndtr
 
 from mushroom.algorithms.agent import Agent
 from mushroom.approximators import EnsembleTable, Regressor
 from mushroom.approximators.parametric import LinearApproximator
-from mushroom.features import get_action_features
 from mushroom.utils.eligibility_trace import EligibilityTrace
 from mushroom.utils.table import Table
 
@@ -14,6 +14,8 @@ class TD(Agent):
     Implements functions to run TD algorithms.
 
     """
+    _batch_update = False
+
     def __init__(self, approximator, policy, mdp_info, params, features=None):
         self.alpha = params['algorithm_params']['learning_rate']
 
@@ -28,6 +30,27 @@ class TD(Agent):
         state, action, reward, next_state, absorbing = self._parse(dataset)
         self._update(state, action, reward, next_state, absorbing)
 
+    def update_batch(self, state, action, reward, next_state, absorbing):
+        """
+        Update the Q-table with a batch of transitions of independent runs,
+        stacked along the first axis, whose states include the index of the
+        run (see `VectorizedTD`). It is only available for Q-Learning, Double
+        Q-Learning and SARSA.
+
+        Args:
+            state (np.ndarray): the states;
+            action (np.ndarray): the actions;
+            reward (np.ndarray): the rewards;
+            next_state (np.ndarray): the next states;
+            absorbing (np.ndarray): the absorbing flags.
+
+        """
+        if not self._batch_update:
+            raise NotImplementedError('The algorithm does not support batch'
+                                      ' updates.')
+
+        self._update(state, action, reward, next_state, absorbing)
+
     @staticmethod
     def _parse(dataset):
         """
@@ -52,7 +75,8 @@ class TD(Agent):
 
     def _update(self, state, action, reward, next_state, absorbing):
         """
-        Update the Q-table.
+        Update the Q-table. The updates of the algorithms supporting
+        `update_batch` also accept a batch of transitions.
 
         Args:
             state (np.ndarray): state;
@@ -71,6 +95,8 @@ class QLearning(TD):
     "Learning from Delayed Rewards". Watkins C.J.C.H.. 1989.
 
     """
+    _batch_update = True
+
     def __init__(self, policy, mdp_info, params):
         self.Q = Table(mdp_info.size)
 
@@ -79,7 +105,7 @@ class QLearning(TD):
     def _update(self, state, action, reward, next_state, absorbing):
         q_current = self.Q[state, action]
 
-        q_next = np.max(self.Q[next_state, :]) if not absorbing else 0.
+        q_next = np.max(self.Q[next_state, :], axis=-1) * (1 - absorbing)
 
         self.Q[state, action] = q_current + self.alpha(state, action) * (
             reward + self.mdp_info.gamma * q_next - q_current)
@@ -91,6 +117,8 @@ class DoubleQLearning(TD):
     "Double Q-Learning". Hasselt H. V.. 2010.
 
     """
+    _batch_update = True
+
     def __init__(self, policy, mdp_info, params):
         self.Q = EnsembleTable(2, mdp_info.size)
 
@@ -102,11 +130,45 @@ class DoubleQLearning(TD):
                                  ' have exactly 2 models.'
 
     def _update(self, state, action, reward, next_state, absorbing):
-        approximator_idx = 0 if np.random.uniform() < .5 else 1
+        if state.ndim == 1:
+            approximator_idx = 0 if np.random.uniform() < .5 else 1
+
+            self._update_approximator(approximator_idx, state, action,
+                                      reward, next_state, absorbing)
+        else:
+            approximator_idx = np.random.uniform(size=len(state)) >= .5
+            for i in xrange(2):
+                runs = np.flatnonzero(approximator_idx == i)
+                if runs.size > 0:
+                    self._update_approximator(
+                        i, state[runs], action[runs], reward[runs],
+                        next_state[runs], absorbing[runs])
+
+    def _update_approximator(self, approximator_idx, state, action, reward,
+                             next_state, absorbing):
+        """
+        Update one of the two Q-tables.
 
+        Args:
+            approximator_idx (int): the index of the Q-table to update;
+            state (np.ndarray): state;
+            action (np.ndarray): action;
+            reward (np.ndarray): reward;
+            next_state (np.ndarray): next state;
+            absorbing (np.ndarray): absorbing flag.
+
+        """
         q_current = self.Q[approximator_idx][state, action]
 
-        if not absorbing:
+        if state.ndim > 1:
+            q_ss = self.Q[approximator_idx][next_state, :]
+            max_q = q_ss == np.max(q_ss, axis=1, keepdims=True)
+            # Ties are broken uniformly at random among the maximizers
+            a_n = np.argmax(np.random.uniform(size=q_ss.shape) * max_q,
+                            axis=1).reshape(-1, 1)
+            q_next = self.Q[1 - approximator_idx][next_state, a_n] * (
+                1 - absorbing)
+        elif not absorbing:
             q_ss = self.Q[approximator_idx][next_state, :]
             max_q = np.max(q_ss)
             a_n = np.array(
@@ -131,7 +193,8 @@ class WeightedQLearning(TD):
     def __init__(self, policy, mdp_info, params):
         self.Q = Table(mdp_info.size)
         self._sampling = params.pop('sampling', True)
-        self._precision = params.pop('precision', 1000)
+        self._precision = params.pop('precision',
+                                     1000 if self._sampling else 100)
 
         super(WeightedQLearning, self).__init__(self.Q, policy, mdp_info, params)
 
@@ -141,6 +204,12 @@ class WeightedQLearning(TD):
         self._Q2 = Table(mdp_info.size)
         self._weights_var = Table(mdp_info.size)
 
+        # Normalized integration points of the weights computed without
+        # sampling and the weights computed for each state whose means and
+        # sigmas have not changed since.
+        self._z = np.linspace(-8., 8., self._precision)
+        self._weights_cache = dict()
+
     def _update(self, state, action, reward, next_state, absorbing):
         q_current = self.Q[state, action]
         q_next = self._next_q(next_state) if not absorbing else 0.
@@ -168,6 +237,8 @@ class WeightedQLearning(TD):
             var_estimator = var_estimator if var_estimator >= 1e-10 else 1e-10
             self._sigma[state, action] = np.sqrt(var_estimator)
 
+        self._weights_cache.pop(tuple(state), None)
+
     def _next_q(self, next_state):
         """
         Args:
@@ -179,12 +250,9 @@ class WeightedQLearning(TD):
 
         """
         means = self.Q[next_state, :]
-        sigmas = np.zeros(self.Q.shape[-1])
-
-        for a in xrange(sigmas.size):
-            sigmas[a] = self._sigma[next_state, np.array([a])]
 
         if self._sampling:
+            sigmas = self._sigma[next_state, :]
             samples = np.random.normal(np.repeat([means], self._precision, 0),
                                        np.repeat([sigmas], self._precision, 0))
             max_idx = np.argmax(samples, axis=1)
@@ -194,10 +262,52 @@ class WeightedQLearning(TD):
 
             w = count / self._precision
         else:
-            raise NotImplementedError
+            key = tuple(next_state)
+            w = self._weights_cache.get(key)
+            if w is None:
+                w = self._max_probabilities(means,
+                                            self._sigma[next_state, :])
+                self._weights_cache[key] = w
 
         return np.dot(w, means)
 
+    def _max_probabilities(self, means, sigmas):
+        """
+        Compute the probability of each action to have the maximum value,
+        when the values are independent gaussians. The probability of action
+        `a` is the integral over `x` of pdf_a(x) * prod_b cdf_b(x), for b != a,
+        computed with the trapezoidal rule within 8 standard deviations of
+        the mean of `a`. The integration points of all the actions are the
+        union of `precision` points within 8 standard deviations of the mean
+        of each action, so that the distributions of the other actions are
+        sampled on their own scale, also when the standard deviations differ
+        by orders of magnitude.
+
+        Args:
+            means (np.ndarray): the means of the values of the actions;
+            sigmas (np.ndarray): the standard deviations of the values of the
+                actions.
+
+        Returns:
+            The probability of each action to be the maximum one.
+
+        """
+        x = np.unique(means[:, None] + sigmas[:, None] * self._z)
+
+        # The points outside the range of each action collapse on its bounds.
+        z = np.clip((x - means[:, None]) / sigmas[:, None], self._z[0],
+                    self._z[-1])
+        x = means[:, None] + sigmas[:, None] * z
+
+        cdf = ndtr((x[:, None, :] - means[None, :, None]) /
+                   sigmas[None, :, None])
+        cdf[np.arange(means.size), np.arange(means.size)] = 1.
+
+        pdf = np.exp(-z ** 2 / 2.) / np.sqrt(2 * np.pi)
+        w = np.trapz(pdf * np.prod(cdf, axis=1), z, axis=1)
+
+        return w / np.sum(w)
+
 
 class SpeedyQLearning(TD):
     """
@@ -207,15 +317,27 @@ class SpeedyQLearning(TD):
     """
     def __init__(self, policy, mdp_info, params):
         self.Q = Table(mdp_info.size)
-        self.old_q = deepcopy(self.Q)
+
+        # The Q-function of the previous step differs from the current one
+        # only in the last updated entry, whose previous value is stored as
+        # (state, action, value).
+        self._old_entry = None
 
         super(SpeedyQLearning, self).__init__(self.Q, policy, mdp_info, params)
 
     def _update(self, state, action, reward, next_state, absorbing):
-        old_q = deepcopy(self.Q)
-
-        max_q_cur = np.max(self.Q[next_state, :]) if not absorbing else 0.
-        max_q_old = np.max(self.old_q[next_state, :]) if not absorbing else 0.
+        if not absorbing:
+            q_next = self.Q[next_state, :]
+            max_q_cur = np.max(q_next)
+
+            if self._old_entry is not None and np.array_equal(
+                    self._old_entry[0], next_state):
+                q_next = q_next.copy()
+                q_next[self._old_entry[1]] = self._old_entry[2]
+            max_q_old = np.max(q_next)
+        else:
+            max_q_cur = 0.
+            max_q_old = 0.
 
         target_cur = reward + self.mdp_info.gamma * max_q_cur
         target_old = reward + self.mdp_info.gamma * max_q_old
@@ -225,7 +347,7 @@ class SpeedyQLearning(TD):
         self.Q[state, action] = q_cur + alpha * (target_old-q_cur) + (
             1. - alpha) * (target_cur - target_old)
 
-        self.old_q = old_q
+        self._old_entry = (state.copy(), action, q_cur)
 
 
 class SARSA(TD):
@@ -233,6 +355,8 @@ class SARSA(TD):
     SARSA algorithm.
 
     """
+    _batch_update = True
+
     def __init__(self, policy, mdp_info, params):
         self.Q = Table(mdp_info.size)
         super(SARSA, self).__init__(self.Q, policy, mdp_info, params)
@@ -240,8 +364,11 @@ class SARSA(TD):
     def _update(self, state, action, reward, next_state, absorbing):
         q_current = self.Q[state, action]
 
-        self._next_action = self.draw_action(next_state)
-        q_next = self.Q[next_state, self._next_action] if not absorbing else 0.
+        if next_state.ndim == 1:
+            self._next_action = self.draw_action(next_state)
+        else:
+            self._next_action = self.draw_actions(next_state)
+        q_next = self.Q[next_state, self._next_action] * (1 - absorbing)
 
         self.Q[state, action] = q_current + self.alpha(state, action) * (
             reward + self.mdp_info.gamma * q_next - q_current)
@@ -252,12 +379,15 @@ class SARSALambdaDiscrete(TD):
     Discrete version of SARSA(lambda) algorithm.
 
     """
+    _episode_attributes = ['_next_action', 'e']
+
     def __init__(self, policy, mdp_info, params):
         self.Q = Table(mdp_info.size)
         self._lambda = params['algorithm_params']['lambda']
 
-        trace = params.get('algorithm_params', 'replacing')
-        self.e = EligibilityTrace(self.Q.shape, trace)
+        trace = params['algorithm_params'].get('trace', 'replacing')
+        cutoff = params['algorithm_params'].get('trace_cutoff', 1e-8)
+        self.e = EligibilityTrace(self.Q.shape, trace, cutoff)
         super(SARSALambdaDiscrete, self).__init__(self.Q, policy, mdp_info,
                                                   params)
 
@@ -270,8 +400,8 @@ class SARSALambdaDiscrete(TD):
         delta = reward + self.mdp_info.gamma * q_next - q_current
         self.e.update(state, action)
 
-        self.Q.table += self.alpha(state, action) * delta * self.e.table
-        self.e.table *= self.mdp_info.gamma * self._lambda
+        self.e.add_to(self.Q.table, self.alpha(state, action) * delta)
+        self.e.decay(self.mdp_info.gamma * self._lambda)
 
     def episode_start(self):
         self.e.reset()
@@ -279,12 +409,25 @@ class SARSALambdaDiscrete(TD):
 
 class SARSALambdaContinuous(TD):
     """
-    Continuous version of SARSA(lambda) algorithm.
+    Continuous version of SARSA(lambda) algorithm. If the approximator is
+    created with `sparse=True`, the features are expected to be the indexes of
+    the active binary features, e.g. sparse tile features, and only the
+    weights of the active features and the non-negligible entries of the trace
+    are updated.
 
     """
+    _episode_attributes = ['_next_action', 'e']
+
     def __init__(self, approximator, policy, mdp_info, params, features):
         self.Q = Regressor(approximator, **params['approximator_params'])
-        self.e = np.zeros(self.Q.weights_size)
+        self._sparse = params['approximator_params'].get('sparse', False)
+        # The derivative of a linear Q-regressor is the feature vector in the
+        # block of the weights of the action.
+        self._linear_q = approximator is LinearApproximator and\
+            self.Q.n_actions == self.Q.output_shape[0]
+        self._trace_cutoff = params['algorithm_params'].get('trace_cutoff',
+                                                            1e-8)
+        self.e = self._init_trace()
         self._lambda = params['algorithm_params']['lambda']
 
         super(SARSALambdaContinuous, self).__init__(self.Q, policy, mdp_info,
@@ -298,8 +441,16 @@ class SARSALambdaContinuous(TD):
 
         alpha = self.alpha(state, action)
 
-        self.e = self.mdp_info.gamma * self._lambda * self.e + self.Q.diff(
-            phi_state, action)
+        if self._sparse:
+            self.e.decay(self.mdp_info.gamma * self._lambda)
+            self.e.add(self._weights_indexes(phi_state, action), 1.)
+        else:
+            self.e *= self.mdp_info.gamma * self._lambda
+            if self._linear_q:
+                start = action[0] * phi_state.size
+                self.e[start:start + phi_state.size] += phi_state
+            else:
+                self.e += self.Q.diff(phi_state, action)
 
         self._next_action = self.draw_action(next_state)
         phi_next_state = self.phi(next_state)
@@ -308,12 +459,40 @@ class SARSALambdaContinuous(TD):
 
         delta = reward + self.mdp_info.gamma * q_next - q_current
 
-        theta = self.Q.get_weights()
-        theta += alpha * delta * self.e
-        self.Q.set_weights(theta)
+        if self._sparse:
+            idxs, e = self.e.entries
+            self.Q.add_to_weights(alpha * delta * e, indexes=idxs)
+        else:
+            self.Q.add_to_weights(alpha * delta * self.e)
 
     def episode_start(self):
-        self.e = np.zeros(self.Q.weights_size)
+        self.e = self._init_trace()
+
+    def _init_trace(self):
+        """
+        Returns:
+            An empty eligibility trace, sparse if the features are sparse.
+
+        """
+        if self._sparse:
+            return EligibilityTrace((self.Q.weights_size,), 'accumulating',
+                                    self._trace_cutoff)
+        else:
+            return np.zeros(self.Q.weights_size)
+
+    def _weights_indexes(self, phi_state, action):
+        """
+        Args:
+            phi_state (np.ndarray): the indexes of the active features of the
+                state;
+            action (np.ndarray): the action.
+
+        Returns:
+            The indexes, in the order of `get_weights`, of the weights of the
+            active features for the action.
+
+        """
+        return action[0] * self.Q.input_shape[0] + phi_state
 
 
 class ExpectedSARSA(TD):
@@ -339,25 +518,22 @@ class ExpectedSARSA(TD):
             reward + self.mdp_info.gamma * q_next - q_current)
 
 
-class TrueOnlineSARSALambda(TD):
+class TrueOnlineSARSALambda(SARSALambdaContinuous):
     """
     True Online SARSA(lambda) with linear function approximation.
     "True Online TD(lambda)". Seijen H. V. et al.. 2014.
 
     """
+    _episode_attributes = ['_next_action', 'e', '_q_old']
+
     def __init__(self, policy, mdp_info, params, features):
-        self.Q = Regressor(LinearApproximator, **params['approximator_params'])
-        self.e = np.zeros(self.Q.weights_size)
-        self._lambda = params['algorithm_params']['lambda']
         self._q_old = None
 
-        super(TrueOnlineSARSALambda, self).__init__(self.Q, policy, mdp_info,
-                                                    params, features)
+        super(TrueOnlineSARSALambda, self).__init__(
+            LinearApproximator, policy, mdp_info, params, features)
 
     def _update(self, state, action, reward, next_state, absorbing):
         phi_state = self.phi(state)
-        phi_state_action = get_action_features(phi_state, action,
-                                               self.mdp_info.action_space.n)
         q_current = self.Q.predict(phi_state, action)
 
         if self._q_old is None:
@@ -365,9 +541,21 @@ class TrueOnlineSARSALambda(TD):
 
         alpha = self.alpha(state, action)
 
-        e_phi = self.e.dot(phi_state_action)
-        self.e = self.mdp_info.gamma * self._lambda * self.e + alpha * (
-            1. - self.mdp_info.gamma * self._lambda * e_phi) * phi_state_action
+        if self._sparse:
+            phi_idxs = self._weights_indexes(phi_state, action)
+            e_phi = self.e.dot(phi_idxs)
+            self.e.decay(self.mdp_info.gamma * self._lambda)
+            self.e.add(phi_idxs, alpha * (
+                1. - self.mdp_info.gamma * self._lambda * e_phi))
+        else:
+            # The state-action features are zero outside the block of the
+            # action.
+            start = action[0] * phi_state.size
+            phi_block = slice(start, start + phi_state.size)
+            e_phi = self.e[phi_block].dot(phi_state)
+            self.e *= self.mdp_info.gamma * self._lambda
+            self.e[phi_block] += alpha * (
+                1. - self.mdp_info.gamma * self._lambda * e_phi) * phi_state
 
         self._next_action = self.draw_action(next_state)
         phi_next_state = self.phi(next_state)
@@ -376,16 +564,23 @@ class TrueOnlineSARSALambda(TD):
 
         delta = reward + self.mdp_info.gamma * q_next - self._q_old
 
-        theta = self.Q.get_weights()
-        theta += delta * self.e + alpha * (
-            self._q_old - q_current) * phi_state_action
-        self.Q.set_weights(theta)
+        if self._sparse:
+            idxs, e = self.e.entries
+            self.Q.add_to_weights(delta * e, indexes=idxs)
+            self.Q.add_to_weights(alpha * (self._q_old - q_current), action,
+                                  indexes=phi_state)
+        else:
+            delta_theta = delta * self.e
+            delta_theta[phi_block] += alpha * (
+                self._q_old - q_current) * phi_state
+            self.Q.add_to_weights(delta_theta)
 
         self._q_old = q_next
 
     def episode_start(self):
         self._q_old = None
-        self.e = np.zeros(self.Q.weights_size)
+
+        super(TrueOnlineSARSALambda, self).episode_start()
 
 
 class RLearning(TD):
@@ -0,0 +1,182 @@
+import numpy as np
+from tqdm import tqdm
+
+from mushroom.environments import MDPInfo
+
+
+class VectorizedTD(object):
+    """
+    Implements functions to run many independent runs of a tabular TD
+    algorithm at once. The algorithm (`QLearning`, `DoubleQLearning` or
+    `SARSA`) is built on the states of the environment extended with the
+    index of the run, so that its Q-tables have a leading `n_runs` axis. At
+    each step, the environment moves all the runs with a single call to
+    `vector_step`, the policy draws their actions with a single call to
+    `draw_actions` and the algorithm applies its update to the whole batch of
+    transitions with `update_batch`.
+
+    """
+    def __init__(self, algorithm_class, policy, mdp, n_runs, params):
+        """
+        Constructor.
+
+        Args:
+            algorithm_class (class): the TD algorithm to run;
+            policy (TDPolicy): the policy followed by the runs (e.g.
+                `EpsGreedy`);
+            mdp (Environment): the environment, providing `vector_reset` and
+                `vector_step`;
+            n_runs (int): the number of independent runs;
+            params (dict): the parameters of the algorithm. The parameters
+                counting the updates of each state or state-action pair (e.g.
+                the learning rate and the exploration coefficient) must have
+                size `(n_runs,) + size`, so that each run keeps its own
+                counts; constant parameters can have a single entry.
+
+        """
+        self.mdp = mdp
+        self.mdp_info = mdp.info
+        self.n_runs = n_runs
+
+        runs_info = MDPInfo(_RunsSpace(n_runs, mdp.info.observation_space),
+                            mdp.info.action_space, mdp.info.gamma,
+                            mdp.info.horizon)
+        self.agent = algorithm_class(policy, runs_info, params)
+
+        self._runs = np.arange(n_runs)
+        self._states = None
+        self._episode_steps = None
+
+    def learn(self, n_steps, quiet=False):
+        """
+        Move all the runs for a number of steps, updating their Q-tables after
+        each step.
+
+        Args:
+            n_steps (int): number of steps to move each run;
+            quiet (bool, False): whether to show the progress bar or not.
+
+        Returns:
+            The array of the rewards collected by each run at each step, with
+            shape (n_steps, n_runs).
+
+        """
+        if self._states is None:
+            self.reset()
+
+        rewards = np.zeros((n_steps, self.n_runs))
+        for t in tqdm(xrange(n_steps), dynamic_ncols=True, disable=quiet,
+                      leave=False):
+            states = self._run_states(self._states)
+            if self.agent.next_action is None:
+                actions = self.agent.draw_actions(states)
+            else:
+                # The actions already chosen by the algorithm for all the
+                # runs (e.g. SARSA).
+                actions = self.agent.draw_action(states)
+
+            next_states, rewards[t], absorbing = self.mdp.vector_step(
+                self._states, actions)
+            self.agent.update_batch(states, actions, rewards[t],
+                                    self._run_states(next_states), absorbing)
+
+            self._episode_steps += 1
+            last = absorbing | (self._episode_steps >= self.mdp_info.horizon)
+            self._states = next_states
+            if np.any(last):
+                self._reset_runs(np.flatnonzero(last))
+
+        return rewards
+
+    def reset(self):
+        """
+        Start a new episode in all the runs.
+
+        """
+        self._states = self.mdp.vector_reset(self.n_runs)
+        self._episode_steps = np.zeros(self.n_runs, dtype=np.int)
+        self._redraw_next_actions(self._runs)
+
+    def q_values(self, states, runs=None):
+        """
+        Args:
+            states (np.ndarray): the states of the runs;
+            runs (np.ndarray, None): the indexes of the runs. If None, all the
+                runs are considered.
+
+        Returns:
+            The action values of each run in its state.
+
+        """
+        runs = self._runs if runs is None else runs
+
+        return self.agent.approximator.predict(
+            self._run_states(states, runs)).reshape(len(runs), -1)
+
+    def _reset_runs(self, runs):
+        """
+        Start a new episode in the provided runs.
+
+        Args:
+            runs (np.ndarray): the indexes of the runs to reset.
+
+        """
+        self._states[runs] = self.mdp.vector_reset(runs.size)
+        self._episode_steps[runs] = 0
+        self._redraw_next_actions(runs)
+
+    def _redraw_next_actions(self, runs):
+        """
+        Replace the actions already chosen by the algorithm for the provided
+        runs, if any, with actions drawn in their new initial states.
+
+        Args:
+            runs (np.ndarray): the indexes of the runs.
+
+        """
+        next_actions = self.agent.next_action
+        if next_actions is not None:
+            next_actions[runs] = self.agent.policy.draw_actions(
+                self._run_states(self._states[runs], runs))
+
+    def _run_states(self, states, runs=None):
+        """
+        Args:
+            states (np.ndarray): the states of the runs;
+            runs (np.ndarray, None): the indexes of the runs. If None, all the
+                runs are considered.
+
+        Returns:
+            The states extended with the index of their run.
+
+        """
+        runs = self._runs if runs is None else runs
+
+        return np.column_stack((runs, states))
+
+
+class _RunsSpace(object):
+    """
+    Discrete space of the states of several runs, extended with the index of
+    their run as first component.
+
+    """
+    def __init__(self, n_runs, space):
+        """
+        Constructor.
+
+        Args:
+            n_runs (int): the number of runs;
+            space (Discrete): the space of the states of each run.
+
+        """
+        self._n_runs = n_runs
+        self._space = space
+
+    @property
+    def size(self):
+        return (self._n_runs,) + self._space.size
+
+    @property
+    def shape(self):
+        return (1 + self._space.shape[0],)
@@ -51,6 +51,16 @@ class ActionRegressor:
             if idxs.size:
                 self.model[i].fit(state[idxs, :], q[idxs], **fit_params)
 
+    def partial_fit(self, state, action, q, **fit_params):
+        state, q = self._preprocess(state, q)
+
+        for i in xrange(len(self.model)):
+            idxs = np.argwhere((action == i)[:, 0]).ravel()
+
+            if idxs.size:
+                self.model[i].partial_fit(state[idxs, :], q[idxs],
+                                          **fit_params)
+
     def predict(self, *z, **predict_params):
         """
         Predict.
@@ -101,6 +111,30 @@ class ActionRegressor:
             stop = start + size
             m.set_weights(w[start:stop])
 
+    def add_to_weights(self, delta, action=None, indexes=None):
+        if action is not None:
+            self.model[action[0]].add_to_weights(delta, indexes=indexes)
+        elif indexes is None:
+            size = self.model[0].weights_size
+            for i, m in enumerate(self.model):
+                start = i * size
+                stop = start + size
+                m.add_to_weights(delta[start:stop])
+        else:
+            size = self.model[0].weights_size
+            delta = np.broadcast_to(delta, indexes.shape)
+            for i, m in enumerate(self.model):
+                idxs = indexes // size == i
+                m.add_to_weights(delta[idxs], indexes=indexes[idxs] - i * size)
+
+    def set_params(self, **params):
+        for m in self.model:
+            m.set_params(**params)
+
+    def sync_from(self, other):
+        for m, other_m in zip(self.model, other.model):
+            m.sync_from(other_m)
+
     def diff(self, state, action):
         if action is None:
             diff = list()
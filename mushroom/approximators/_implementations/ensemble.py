@@ -44,9 +44,29 @@ class Ensemble(object):
         else:
             self[idx].fit(*z, **fit_params)
 
+    def partial_fit(self, *z, **fit_params):
+        """
+        Partially fit the `idx`-th model of the ensemble if `idx` is provided,
+        a random model otherwise.
+
+        Args:
+            *z (list): a list containing the inputs to use to fit the
+                regressor;
+            **fit_params (dict): other params.
+
+        """
+        idx = fit_params.pop('idx', None)
+        if idx is None:
+            self[np.random.choice(len(self))].partial_fit(*z, **fit_params)
+        else:
+            self[idx].partial_fit(*z, **fit_params)
+
     def predict(self, *z, **predict_params):
         """
-        Predict.
+        Predict. If `idx` is an integer, the prediction of the `idx`-th model
+        is returned; if it is a list of indexes, the predictions of the
+        corresponding models are returned stacked along the first axis.
+        Otherwise, the predictions of all the models are combined.
 
         Args:
             *z (list): a list containing the inputs to use to predict with each
@@ -58,7 +78,9 @@ class Ensemble(object):
 
         """
         idx = predict_params.pop('idx', None)
-        if idx is None:
+        if isinstance(idx, (list, tuple, np.ndarray)):
+            results = self._predict_stacked(idx, *z, **predict_params)
+        elif idx is None:
             predictions = list()
             for i in xrange(len(self._model)):
                 try:
@@ -85,6 +107,60 @@ class Ensemble(object):
 
         return results
 
+    def _predict_stacked(self, idxs, *z, **predict_params):
+        """
+        Predict with a subset of the models of the ensemble. If the models
+        implement `predict_ensemble`, the predictions are computed with a
+        single call to it, e.g. a single forward pass of all the networks;
+        otherwise, each model is called separately.
+
+        Args:
+            idxs (list): the indexes of the models to use;
+            *z (list): a list containing the inputs to use to predict with each
+                regressor of the ensemble;
+            **predict_params (dict): other params.
+
+        Returns:
+            The array of the predictions of the models, with shape
+            (len(idxs),) + the shape of the prediction of one model.
+
+        """
+        models = [self[i] for i in idxs]
+        if hasattr(models[0], 'predict_ensemble'):
+            return np.array(models[0].predict_ensemble(models, *z,
+                                                       **predict_params))
+
+        return np.array([m.predict(*z, **predict_params) for m in models])
+
+    def sync_from(self, other):
+        """
+        Copy the weights of another model in each model of the ensemble.
+
+        Args:
+            other (object): the model to copy. If it is an `Ensemble` with
+                the same number of models, each model copies the
+                corresponding one.
+
+        """
+        if isinstance(other, Ensemble):
+            assert len(other) == len(self)
+            for m, other_m in zip(self._model, other._model):
+                m.sync_from(other_m)
+        else:
+            for m in self._model:
+                m.sync_from(other)
+
+    def set_params(self, **params):
+        """
+        Set the parameters of each model of the ensemble.
+
+        Args:
+            **params (dict): the parameters to set.
+
+        """
+        for m in self._model:
+            m.set_params(**params)
+
     def __len__(self):
         return len(self._model)
 
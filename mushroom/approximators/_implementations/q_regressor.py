@@ -38,6 +38,10 @@ class QRegressor:
         state, q = self._preprocess(state, q)
         self.model.fit(state, action, q, **fit_params)
 
+    def partial_fit(self, state, action, q, **fit_params):
+        state, q = self._preprocess(state, q)
+        self.model.partial_fit(state, action, q, **fit_params)
+
     def predict(self, *z, **predict_params):
         """
         Predict.
@@ -77,6 +81,15 @@ class QRegressor:
     def set_weights(self, w):
         self.model.set_weights(w)
 
+    def add_to_weights(self, delta, action=None, indexes=None):
+        self.model.add_to_weights(delta, action, indexes)
+
+    def set_params(self, **params):
+        self.model.set_params(**params)
+
+    def sync_from(self, other):
+        self.model.sync_from(other.model)
+
     def diff(self, state, action=None):
         return self.model.diff(state, action)
 
@@ -32,6 +32,10 @@ class SimpleRegressor:
         x, y = self._preprocess(x, y)
         self.model.fit(x, y, **fit_params)
 
+    def partial_fit(self, x, y, **fit_params):
+        x, y = self._preprocess(x, y)
+        self.model.partial_fit(x, y, **fit_params)
+
     def predict(self, x, **predict_params):
         """
         Predict.
@@ -59,6 +63,15 @@ class SimpleRegressor:
     def set_weights(self, w):
         self.model.set_weights(w)
 
+    def add_to_weights(self, delta, indexes=None):
+        self.model.add_to_weights(delta, indexes=indexes)
+
+    def set_params(self, **params):
+        self.model.set_params(**params)
+
+    def sync_from(self, other):
+        self.model.sync_from(other.model)
+
     def diff(self, x):
         x = self._preprocess(x)
         return self.model.diff(x)
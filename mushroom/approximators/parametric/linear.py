@@ -7,7 +7,7 @@ class LinearApproximator:
 
     """
     def __init__(self, weights=None, input_shape=None, output_shape=1,
-                 **kwargs):
+                 sparse=False, **kwargs):
         """
         Constructor.
 
@@ -16,6 +16,10 @@ class LinearApproximator:
                 of the approximator;
              input_shape (np.ndarray): the shape of the input of the model;
              output_shape (np.ndarray): the shape of the output of the model;
+             sparse (bool, False): whether the input is given as the indexes
+                of the active binary features, e.g. the ones returned by
+                sparse tile features, instead of the feature vector. Negative
+                indexes are ignored;
              **kwargs (dict): other params of the approximator.
 
         """
@@ -32,6 +36,8 @@ class LinearApproximator:
             raise ValueError('You should specify the initial parameter vector'
                              ' or the input dimension')
 
+        self._sparse = sparse
+
     def fit(self, x, y, **fit_params):
         """
         Fit the model.
@@ -58,6 +64,11 @@ class LinearApproximator:
             The predictions of the model.
 
         """
+        if self._sparse:
+            active_w = self._w[:, x] * (x >= 0)
+
+            return active_w.sum(axis=2).T
+
         prediction = np.ones((x.shape[0], self._w.shape[0]))
         for i, x_i in enumerate(x):
             prediction[i] = x_i.dot(self._w.T)
@@ -72,9 +83,44 @@ class LinearApproximator:
         return self._w.flatten()
 
     def set_weights(self, w):
-        self._w = w.reshape(self._w.shape)
+        self._w = w.reshape(self._w.shape).copy()
+
+    def add_to_weights(self, delta, action=None, indexes=None):
+        """
+        Add an update to the weights in place, without copying them.
+
+        Args:
+            delta ([float, np.ndarray]): the update of the weights. If
+                `action` is provided, it is the update of the weights of the
+                output corresponding to the action only. If `indexes` is
+                provided, it is the update of the selected weights only;
+            action (np.ndarray, None): the action whose output has to be
+                updated;
+            indexes (np.ndarray, None): the indexes of the weights to update,
+                among the ones of the output corresponding to `action`, if
+                provided, or among all the weights, in the order of
+                `get_weights`, otherwise. The indexes must be unique.
+
+        """
+        if indexes is None:
+            if action is None:
+                self._w += delta.reshape(self._w.shape)
+            else:
+                self._w[action[0]] += delta
+        elif action is None:
+            self._w.flat[indexes] += delta
+        else:
+            self._w[action[0], indexes] += delta
+
+    def sync_from(self, other):
+        self._w = other._w.copy()
 
     def diff(self, state, action=None):
+        if self._sparse:
+            phi = np.zeros(self._w.shape[1])
+            phi[state[state >= 0]] = 1.
+            state = phi
+
         if len(self._w.shape) == 1 or self._w.shape[0] == 1:
             return state
         else:
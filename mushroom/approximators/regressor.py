@@ -80,6 +80,25 @@ class Regressor:
             z = [np.expand_dims(z_i, axis=0) for z_i in z]
         self._impl.fit(*z, **fit_params)
 
+    def partial_fit(self, *z, **fit_params):
+        """
+        Update the model with a batch of samples, without fitting it from
+        scratch. This is used to fit the model on datasets that are processed
+        batch by batch.
+
+        Args:
+            *z (list): list of input of the model;
+            **fit_params (dict): parameters to use to fit the model.
+
+        """
+        if z[0].ndim == len(self.input_shape):
+            z = [np.expand_dims(z_i, axis=0) for z_i in z]
+        try:
+            self._impl.partial_fit(*z, **fit_params)
+        except AttributeError:
+            raise NotImplementedError('Attempt to partially fit a model that'
+                                      ' does not support it.')
+
     def predict(self, *z, **predict_params):
         """
         Predict the output of the model given an input.
@@ -160,6 +179,55 @@ class Regressor:
             raise NotImplementedError('Attempt to set weights of a'
                                       ' non-parametric regressor.')
 
+    def add_to_weights(self, *z, **kwargs):
+        """
+        Add an update to the weights of the model in place, avoiding the
+        copies of `get_weights` and `set_weights`.
+
+        Args:
+            *z (list): the update of the weights and, optionally, the action
+                whose weights have to be updated;
+            **kwargs (dict): other parameters of the update, e.g. the indexes
+                of the weights to update.
+
+        """
+        try:
+            self._impl.add_to_weights(*z, **kwargs)
+        except AttributeError:
+            raise NotImplementedError('Attempt to update in place the weights'
+                                      ' of a model that does not support it.')
+
+    def set_params(self, **params):
+        """
+        Set the parameters of the model, e.g. to grow the number of estimators
+        of a scikit-learn ensemble fitted with `warm_start`.
+
+        Args:
+            **params (dict): the parameters to set.
+
+        """
+        try:
+            self._impl.set_params(**params)
+        except AttributeError:
+            raise NotImplementedError('Attempt to set the parameters of a model'
+                                      ' that does not support it.')
+
+    def sync_from(self, other):
+        """
+        Copy the weights of another regressor with the same structure,
+        without moving them out of the backend of the model, e.g. with a
+        single assign operation for TensorFlow models.
+
+        Args:
+            other (Regressor): the regressor to copy.
+
+        """
+        try:
+            self._impl.sync_from(other._impl)
+        except AttributeError:
+            raise NotImplementedError('Attempt to synchronize a model that'
+                                      ' does not support it.')
+
     def diff(self, *z):
         """
         Args:
@@ -1,7 +1,15 @@
+from copy import deepcopy
+import multiprocessing as mp
+from Queue import Empty, Full
+import time
+
+from joblib import Parallel, delayed, effective_n_jobs
 from tqdm import tqdm
 
 import numpy as np
 
+from mushroom.utils.dataset import Dataset
+
 
 class Core(object):
     """
@@ -71,7 +79,7 @@ class Core(object):
         self._run(n_steps, n_episodes, fit_condition, render, quiet)
 
     def evaluate(self, initial_states=None, n_steps=None, n_episodes=None,
-                 render=False, quiet=False):
+                 render=False, quiet=False, n_jobs=1):
         """
         This function moves the agent in the environment using its policy.
         The agent is moved for a provided number of steps, episodes, or from
@@ -83,14 +91,74 @@ class Core(object):
             n_steps (int, None): number of steps to move the agent;
             n_episodes (int, None): number of episodes to move the agent;
             render (bool, False): whether to render the environment or not;
-            quiet (bool, False): whether to show the progress bar or not.
+            quiet (bool, False): whether to show the progress bar or not;
+            n_jobs (int, 1): number of worker processes among which the
+                episodes are split. Negative values are interpreted as in
+                joblib (e.g. -1 uses all the CPUs). Only available when
+                moving the agent for a number of episodes or from a set of
+                initial states.
 
         """
+        if effective_n_jobs(n_jobs) > 1:
+            return self._evaluate_parallel(initial_states, n_episodes,
+                                           quiet, n_jobs)
+
+        self._n_steps_per_fit = None
+        self._n_episodes_per_fit = None
+
         fit_condition = lambda: False
 
         return self._run(n_steps, n_episodes, fit_condition, render, quiet,
                          initial_states)
 
+    def _evaluate_parallel(self, initial_states, n_episodes, quiet, n_jobs):
+        """
+        Split the episodes to evaluate among a pool of worker processes. Each
+        worker moves a copy of the agent in a copy of the environment for a
+        contiguous shard of the episodes, using its own seed drawn from the
+        current random state. The datasets collected by the workers are
+        concatenated in the original order of the episodes.
+
+        Args:
+            initial_states (np.ndarray, None): the starting states of each
+                episode;
+            n_episodes (int, None): number of episodes to move the agent;
+            quiet (bool): whether to show the progress bar or not;
+            n_jobs (int): number of worker processes.
+
+        Returns:
+            The dataset collected by all the workers.
+
+        """
+        assert n_episodes is not None and initial_states is None\
+            or n_episodes is None and initial_states is not None,\
+            'Parallel evaluation is only available for a number of episodes' \
+            ' or a set of initial states.'
+
+        n_workers = effective_n_jobs(n_jobs)
+        if initial_states is not None:
+            shards = [s for s in np.array_split(initial_states, n_workers)
+                      if len(s) > 0]
+            worker_params = [dict(initial_states=s) for s in shards]
+        else:
+            shards = [s for s in np.array_split(np.arange(n_episodes),
+                                                n_workers) if s.size > 0]
+            worker_params = [dict(n_episodes=s.size) for s in shards]
+
+        seeds = np.random.randint(np.iinfo(np.int32).max,
+                                  size=len(worker_params))
+
+        datasets = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate_worker)(self.agent, self.mdp, seed, quiet,
+                                      **params)
+            for seed, params in zip(seeds, worker_params))
+
+        dataset = Dataset(sum([len(d) for d in datasets]))
+        for d in datasets:
+            dataset += d
+
+        return dataset
+
     def _run(self, n_steps, n_episodes, fit_condition, render, quiet,
              initial_states=None):
         assert n_episodes is not None and n_steps is None and initial_states is None\
@@ -130,7 +198,7 @@ class Core(object):
 
         self.reset(initial_states)
 
-        dataset = list()
+        dataset = Dataset(self._dataset_capacity())
         while move_condition():
             sample = self._step(render)
             dataset.append(sample)
@@ -154,10 +222,22 @@ class Core(object):
                     callback_pars = dict(dataset=dataset)
                     c(**callback_pars)
 
-                dataset = list()
+                dataset = Dataset(self._dataset_capacity())
 
         return dataset
 
+    def _dataset_capacity(self):
+        """
+        Returns:
+            The number of samples to preallocate in the dataset collected
+            between two fits.
+
+        """
+        n_steps = [n for n in (self._n_steps, self._n_steps_per_fit)
+                   if n is not None]
+
+        return min(n_steps) if len(n_steps) > 0 else 1000
+
     def _step(self, render):
         """
         Single step.
@@ -201,3 +281,513 @@ class Core(object):
         self._state = self.mdp.reset(initial_state)
         self.agent.episode_start()
         self._episode_steps = 0
+
+
+def _evaluate_worker(agent, mdp, seed, quiet, initial_states=None,
+                     n_episodes=None):
+    """
+    Evaluate a snapshot of the agent in a worker process.
+
+    Args:
+        agent (Agent): the agent to evaluate;
+        mdp (Environment): the environment in which the agent moves;
+        seed (int): the seed of the worker;
+        quiet (bool): whether to show the progress bar or not;
+        initial_states (np.ndarray, None): the starting states of each
+            episode;
+        n_episodes (int, None): number of episodes to move the agent.
+
+    Returns:
+        The dataset collected by the worker.
+
+    """
+    np.random.seed(seed)
+    try:
+        mdp.seed(seed)
+    except NotImplementedError:
+        pass
+
+    core = Core(agent, mdp)
+
+    return core.evaluate(initial_states=initial_states, n_episodes=n_episodes,
+                         quiet=quiet)
+
+
+def _actor_worker(build_agent, build_mdp, replay_memory, segment,
+                  weights_queue, stop_event, seed, n_steps_per_add):
+    """
+    Move an actor in its own copy of the environment, writing the collected
+    transitions in its own segment of the shared replay memory and loading
+    the weights sent by the learner. The episodes continue across the
+    writes, so that they are only interrupted by the environment. The agent
+    of the actor is only used to draw the actions and it is never fitted.
+
+    Args:
+        build_agent (function): function building the agent of the actor from
+            the MDPInfo of the environment and the shared replay memory;
+        build_mdp (function): function building the environment;
+        replay_memory (SharedReplayMemory): the memory shared with the
+            learner;
+        segment (int): the index of the segment of the memory written by the
+            actor;
+        weights_queue (multiprocessing.Queue): the queue of the weights sent
+            by the learner;
+        stop_event (multiprocessing.Event): the event signaling the actor to
+            stop;
+        seed (int): the seed of the actor;
+        n_steps_per_add (int): number of steps collected before writing them
+            in the memory.
+
+    """
+    np.random.seed(seed)
+    mdp = build_mdp()
+    try:
+        mdp.seed(seed)
+    except NotImplementedError:
+        pass
+    agent = build_agent(mdp.info, replay_memory)
+
+    state = None
+    episode_steps = 0
+    while not stop_event.is_set():
+        try:
+            weights = None
+            while True:
+                weights = weights_queue.get_nowait()
+        except Empty:
+            if weights is not None:
+                agent.approximator.model.set_weights(weights)
+
+        dataset = Dataset(n_steps_per_add)
+        for _ in xrange(n_steps_per_add):
+            if state is None:
+                state = mdp.reset()
+                agent.episode_start()
+                episode_steps = 0
+
+            action = agent.draw_action(state)
+            next_state, reward, absorbing, _ = mdp.step(action)
+            episode_steps += 1
+
+            last = not(episode_steps < mdp.info.horizon and not absorbing)
+            dataset.append((state, action, reward, next_state, absorbing,
+                            last))
+
+            state = None if last else np.array(next_state)
+
+        replay_memory.add(dataset, segment)
+
+
+class ActorLearner(object):
+    """
+    Implements the actor/learner scheme to run a replay-based agent, e.g.
+    DQN. Several actor processes move their own copy of the agent in their
+    own copy of the environment and write the collected transitions in their
+    own segment of a `SharedReplayMemory`. The learner, running in the current process, fits
+    its agent on the samples of the same memory and periodically sends its
+    weights to the actors. The collection of samples thus scales with the
+    number of actors instead of being tied to the updates of the learner.
+
+    """
+    def __init__(self, agent, replay_memory, build_agent, build_mdp, n_actors,
+                 n_steps_per_add=100, weights_frequency=100):
+        """
+        Constructor.
+
+        Args:
+            agent (DQN): the learner agent, whose replay memory is
+                `replay_memory`;
+            replay_memory (SharedReplayMemory): the memory shared by the
+                learner and the actors, with one segment for each actor;
+            build_agent (function): function building the agent of each
+                actor from the MDPInfo of the environment and the shared
+                replay memory. Its policy should define the exploration of
+                the actor. The actors never fit their agents, so the memory
+                should be given to the agent (e.g. as the `replay_memory`
+                parameter of DQN) to avoid allocating a memory of
+                `max_replay_size` samples in each actor;
+            build_mdp (function): function building the environment of each
+                actor;
+            n_actors (int): number of actor processes;
+            n_steps_per_add (int, 100): number of steps collected by an actor
+                before writing them in the memory;
+            weights_frequency (int, 100): number of fits of the learner
+                between each broadcast of its weights to the actors.
+
+        """
+        if replay_memory.n_segments != n_actors:
+            raise ValueError('The replay memory must have one segment for'
+                             ' each actor.')
+
+        self.agent = agent
+        self._replay_memory = replay_memory
+        self._build_agent = build_agent
+        self._build_mdp = build_mdp
+        self._n_actors = n_actors
+        self._n_steps_per_add = n_steps_per_add
+        self._weights_frequency = weights_frequency
+
+        self._actors = list()
+        self._weights_queues = list()
+        self._stop_event = None
+        self._n_fits = 0
+
+    def learn(self, n_fits, quiet=False):
+        """
+        Fit the learner on batches of the samples collected by the actors,
+        calling its `fit_batch` method once per fit. The actors are
+        started by the first call and keep collecting samples until `stop` is
+        called.
+
+        Args:
+            n_fits (int): number of fits of the learner, not counting the ones
+                waiting for the memory to be initialized;
+            quiet (bool, False): whether to show the progress bar or not.
+
+        """
+        if not self._actors:
+            self.start()
+
+        fits_progress_bar = tqdm(total=n_fits, dynamic_ncols=True,
+                                 disable=quiet, leave=False)
+        i = 0
+        while i < n_fits:
+            if not self._replay_memory.initialized:
+                self._check_actors()
+                time.sleep(.01)
+                continue
+
+            self.agent.fit_batch()
+
+            i += 1
+            self._n_fits += 1
+            fits_progress_bar.update(1)
+            if self._n_fits % self._weights_frequency == 0:
+                self._check_actors()
+                self._broadcast_weights()
+
+        fits_progress_bar.close()
+
+    def start(self):
+        """
+        Start the actor processes, sending them the current weights of the
+        learner.
+
+        """
+        self._stop_event = mp.Event()
+        self._weights_queues = [mp.Queue(maxsize=1)
+                                for _ in xrange(self._n_actors)]
+
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=self._n_actors)
+        self._actors = [
+            mp.Process(target=_actor_worker,
+                       args=(self._build_agent, self._build_mdp,
+                             self._replay_memory, i, q, self._stop_event,
+                             seed, self._n_steps_per_add))
+            for i, (q, seed) in enumerate(zip(self._weights_queues, seeds))
+        ]
+        for actor in self._actors:
+            actor.daemon = True
+            actor.start()
+
+        self._broadcast_weights()
+
+    def stop(self):
+        """
+        Stop the actor processes.
+
+        """
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for actor in self._actors:
+            actor.join()
+        self._actors = list()
+
+    def _check_actors(self):
+        """
+        Stop the actors and raise an error if any of them has terminated,
+        e.g. because of an exception, since the memory would stop growing.
+
+        """
+        for i, actor in enumerate(self._actors):
+            if not actor.is_alive():
+                exitcode = actor.exitcode
+                self.stop()
+
+                raise RuntimeError('The actor %d terminated with exit code'
+                                   ' %d.' % (i, exitcode))
+
+    def _broadcast_weights(self):
+        weights = self.agent.approximator.model.get_weights()
+        for q in self._weights_queues:
+            # Only the most recent weights are kept in the queue.
+            try:
+                q.get_nowait()
+            except Empty:
+                pass
+            try:
+                q.put_nowait(weights)
+            except Full:
+                pass
+
+
+class VectorCore(Core):
+    """
+    Implements the functions to run a generic algorithm on several copies of
+    the same environment. At each step, the agent draws the actions of all the
+    copies with a single call to `draw_actions`, so that policies and
+    approximators can process the whole batch of states at once. The episodes
+    of each copy are reset and counted independently, while the number of
+    steps and episodes requested to `learn` and `evaluate` refers to the
+    total over all the copies. The attributes of the agent depending on the
+    current episode (e.g. the action already chosen by SARSA or the eligibility
+    traces) are kept for each copy and restored before the agent acts or is
+    fitted on it.
+
+    """
+    def __init__(self, agent, mdp, n_envs=None, callbacks=None):
+        """
+        Constructor.
+
+        Args:
+            agent (Agent): the agent moving according to a policy;
+            mdp ([Environment, list]): the environment in which the agent
+                moves, or the list of its copies;
+            n_envs (int, None): number of copies of `mdp` to create. Only
+                needed when a single environment is provided;
+            callbacks (list): list of callbacks to execute at the end of
+                each learn iteration.
+
+        """
+        if isinstance(mdp, list):
+            assert n_envs is None or n_envs == len(mdp)
+            self.mdps = mdp
+        else:
+            assert n_envs is not None and n_envs >= 1
+            self.mdps = [mdp] + [deepcopy(mdp) for _ in xrange(n_envs - 1)]
+
+        super(VectorCore, self).__init__(agent, self.mdps[0], callbacks)
+
+        self._states = [None] * self.n_envs
+        self._episodes_steps = np.zeros(self.n_envs, dtype=np.int)
+        self._episodes_ids = -np.ones(self.n_envs, dtype=np.int)
+        self._started_episodes_counter = 0
+        self._episodes = None
+        self._completed_episodes = None
+        self._agent_states = [None] * self.n_envs
+
+    def _run_impl(self, move_condition, fit_condition, steps_progress_bar,
+                  episodes_progress_bar, render, initial_states):
+        self._total_episodes_counter = 0
+        self._total_steps_counter = 0
+        self._current_episodes_counter = 0
+        self._current_steps_counter = 0
+
+        self.reset(initial_states)
+
+        while move_condition():
+            envs = self._active_envs()
+            actions = self._draw_actions(envs)
+
+            for i, action in zip(envs, actions):
+                sample = self._step(i, action, render and i == 0)
+                self._episodes[i].append(sample)
+                self._total_steps_counter += 1
+                self._current_steps_counter += 1
+                steps_progress_bar.update(1)
+
+                if sample[-1]:
+                    self._total_episodes_counter += 1
+                    self._current_episodes_counter += 1
+                    episodes_progress_bar.update(1)
+
+                    self._completed_episodes.append(
+                        (self._episodes_ids[i], self._episodes[i]))
+                    self._episodes[i] = list()
+                    self._reset_env(i, initial_states)
+
+                if fit_condition():
+                    dataset = self._flush(
+                        partial_episodes=self._n_steps_per_fit is not None)
+                    self.agent.set_episode_state(self._agent_states[i])
+                    self.agent.fit(dataset)
+                    self._agent_states[i] = self.agent.get_episode_state()
+                    self._current_episodes_counter = 0
+                    self._current_steps_counter = 0
+
+                    for c in self.callbacks:
+                        callback_pars = dict(dataset=dataset)
+                        c(**callback_pars)
+
+        return self._flush(partial_episodes=True)
+
+    def _draw_actions(self, envs):
+        """
+        Draw the actions of the provided copies. The actions already chosen by
+        the agent for a copy are drawn one at a time in the episode state of
+        the copy, while all the others are drawn with a single call to
+        `draw_actions`, or to `draw_action` if there is only one, as in
+        `Core`.
+
+        Args:
+            envs (np.ndarray): the indexes of the copies.
+
+        Returns:
+            The actions of the copies.
+
+        """
+        actions = [None] * len(envs)
+        batch = list()
+        for k, i in enumerate(envs):
+            self.agent.set_episode_state(self._agent_states[i])
+            if self.agent.next_action is not None:
+                actions[k] = self.agent.draw_action(self._states[i])
+                self._agent_states[i] = self.agent.get_episode_state()
+            else:
+                batch.append(k)
+
+        if len(batch) == 1:
+            actions[batch[0]] = self.agent.draw_action(
+                self._states[envs[batch[0]]])
+        elif batch:
+            batch_actions = self.agent.draw_actions(
+                np.array([self._states[envs[k]] for k in batch]))
+            for k, action in zip(batch, batch_actions):
+                actions[k] = action
+
+        return actions
+
+    def _active_envs(self):
+        """
+        Returns:
+            The indexes of the copies to move in the current step. When the
+            agent is moved for a number of steps, only the copies needed to
+            reach it are moved; otherwise, only the copies with a running
+            episode are moved.
+
+        """
+        if self._n_steps is not None:
+            n_active = min(self.n_envs,
+                           self._n_steps - self._total_steps_counter)
+
+            return np.arange(n_active)
+        else:
+            return np.argwhere(self._episodes_ids >= 0).ravel()
+
+    def _flush(self, partial_episodes):
+        """
+        Collect the samples to return or to use for the next fit. Completed
+        episodes are returned in the order in which they were started, such
+        that each episode is a contiguous block of samples.
+
+        Args:
+            partial_episodes (bool): whether to also return the samples of
+                the episodes not completed yet. In this case, these samples are
+                appended after the completed episodes, grouped by copy, with
+                their last step flags unchanged, as the samples of an episode
+                split between two fits in `Core`.
+
+        Returns:
+            The dataset of collected samples.
+
+        """
+        dataset = Dataset(self._dataset_capacity())
+        for _, episode in sorted(self._completed_episodes, key=lambda e: e[0]):
+            dataset += episode
+        self._completed_episodes = list()
+
+        if partial_episodes:
+            for i in np.argsort(self._episodes_ids):
+                dataset += self._episodes[i]
+                self._episodes[i] = list()
+
+        return dataset
+
+    def _step(self, i, action, render):
+        """
+        Single step of the `i`-th copy of the environment.
+
+        Args:
+            i (int): the index of the copy to move;
+            action (np.ndarray): the action to execute;
+            render (bool): whether to render or not.
+
+        Returns:
+            A tuple containing the previous state, the action sampled by the
+            agent, the reward obtained, the reached state, the absorbing flag
+            of the reached state and the last step flag.
+
+        """
+        mdp = self.mdps[i]
+        next_state, reward, absorbing, _ = mdp.step(action)
+
+        self._episodes_steps[i] += 1
+
+        if render:
+            mdp.render()
+
+        last = not(
+            self._episodes_steps[i] < mdp.info.horizon and not absorbing)
+
+        state = self._states[i]
+        self._states[i] = np.array(next_state)  # Copy for safety reasons
+
+        return state, action, reward, next_state, absorbing, last
+
+    def reset(self, initial_states=None):
+        """
+        Reset the state of the agent and of all the copies of the environment.
+
+        """
+        self._started_episodes_counter = 0
+        self._episodes = [list() for _ in xrange(self.n_envs)]
+        self._completed_episodes = list()
+        self._episodes_ids[:] = -1
+
+        for i in xrange(self.n_envs):
+            self._reset_env(i, initial_states)
+
+    def _reset_env(self, i, initial_states):
+        """
+        Start a new episode in the `i`-th copy of the environment. When the
+        agent is moved for a number of episodes, the copy is left idle if all
+        the requested episodes have already been started.
+
+        Args:
+            i (int): the index of the copy to reset;
+            initial_states (np.ndarray, None): the starting states of each
+                episode.
+
+        """
+        if self._n_episodes is not None\
+                and self._started_episodes_counter >= self._n_episodes:
+            self._episodes_ids[i] = -1
+
+            return
+
+        if initial_states is None:
+            initial_state = None
+        else:
+            initial_state = initial_states[self._started_episodes_counter]
+
+        self._states[i] = self.mdps[i].reset(initial_state)
+        self._episodes_steps[i] = 0
+        self._episodes_ids[i] = self._started_episodes_counter
+        self._started_episodes_counter += 1
+
+        if self._agent_states[i] is not None:
+            self.agent.set_episode_state(self._agent_states[i])
+        self.agent.episode_start()
+        if self._agent_states[i] is None:
+            self._agent_states[i] = deepcopy(self.agent.get_episode_state())
+        else:
+            self._agent_states[i] = self.agent.get_episode_state()
+
+    @property
+    def n_envs(self):
+        """
+        Returns:
+             the number of copies of the environment.
+
+        """
+        return len(self.mdps)
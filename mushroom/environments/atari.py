@@ -27,7 +27,8 @@ class Atari(Environment):
         # MDP properties
         action_space = Discrete(self.env.action_space.n)
         observation_space = Box(
-            low=0., high=255., shape=(self.img_size[1], self.img_size[0]))
+            low=0., high=255., shape=(self.img_size[1], self.img_size[0]),
+            dtype=np.uint8)
         horizon = np.inf
         gamma = .99
         mdp_info = MDPInfo(observation_space, action_space, gamma, horizon)
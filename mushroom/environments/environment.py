@@ -61,6 +61,36 @@ class Environment(object):
         """
         raise NotImplementedError
 
+    def vector_reset(self, n_runs):
+        """
+        Sample the initial states of several independent runs of the
+        environment, without changing its current state.
+
+        Args:
+            n_runs (int): the number of runs.
+
+        Returns:
+            The initial states of the runs, stacked along the first axis.
+
+        """
+        raise NotImplementedError
+
+    def vector_step(self, states, actions):
+        """
+        Move the agents of several independent runs of the environment at
+        once, without changing its current state.
+
+        Args:
+            states (np.ndarray): the current states of the runs, stacked
+                along the first axis;
+            actions (np.ndarray): the actions to execute in each run.
+
+        Returns:
+            The next states, the rewards and the absorbing flags of the runs.
+
+        """
+        raise NotImplementedError
+
     def render(self, mode='human', close=False):
         raise NotImplementedError
 
@@ -23,6 +23,8 @@ class FiniteMDP(Environment):
         gamma = gamma
         mdp_info = MDPInfo(observation_space, action_space, gamma, horizon)
 
+        self._absorbing = ~np.any(self.p, axis=(1, 2))
+
         super(FiniteMDP, self).__init__(mdp_info)
 
     def reset(self, state=None):
@@ -46,3 +48,27 @@ class FiniteMDP(Environment):
         self._state = next_state
 
         return self._state, reward, absorbing, {}
+
+    def vector_reset(self, n_runs):
+        if self.mu is not None:
+            states = np.random.choice(self.mu.size, size=n_runs, p=self.mu)
+        else:
+            states = np.random.choice(self.p.shape[0], size=n_runs)
+
+        return states.reshape(-1, 1)
+
+    def vector_step(self, states, actions):
+        s = states[:, 0]
+        a = actions[:, 0]
+
+        # Each run samples its next state by inverting the cumulative
+        # distribution of its transition probabilities.
+        cum_p = np.cumsum(self.p[s, a, :], axis=1)
+        u = np.random.uniform(size=(s.size, 1)) * cum_p[:, -1:]
+        next_states = np.minimum(np.sum(cum_p <= u, axis=1),
+                                 self.p.shape[0] - 1)
+
+        rewards = self.r[s, a, next_states]
+        absorbing = self._absorbing[next_states]
+
+        return next_states.reshape(-1, 1), rewards, absorbing
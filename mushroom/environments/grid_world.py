@@ -38,9 +38,62 @@ class AbstractGridWorld(Environment):
 
         return self._state, reward, absorbing, info
 
+    def vector_reset(self, n_runs):
+        state = self.convert_to_int(self._start, self._width)
+
+        return np.repeat(state.reshape(1, -1), n_runs, axis=0)
+
+    def vector_step(self, states, actions):
+        rows = states[:, 0] / self._width
+        columns = states[:, 0] % self._width
+
+        rows, columns, rewards, absorbing = self._vector_step(
+            rows, columns, actions[:, 0])
+
+        return (rows * self._width + columns).reshape(-1, 1), rewards,\
+            absorbing
+
     def _step(self, state, action):
         raise NotImplementedError('AbstractGridWorld is an abstract class.')
 
+    def _vector_step(self, rows, columns, actions):
+        """
+        Move the agents of several runs at once.
+
+        Args:
+            rows (np.ndarray): the rows of the agents;
+            columns (np.ndarray): the columns of the agents;
+            actions (np.ndarray): the actions of the agents.
+
+        Returns:
+            The new rows and columns of the agents, the rewards and the
+            absorbing flags.
+
+        """
+        raise NotImplementedError('Vectorized steps are not available for'
+                                  ' this grid world.')
+
+    def _vector_move(self, rows, columns, actions):
+        """
+        Move the agents of several runs at once in the four directions, without
+        leaving the grid.
+
+        Args:
+            rows (np.ndarray): the rows of the agents;
+            columns (np.ndarray): the columns of the agents;
+            actions (np.ndarray): the actions of the agents.
+
+        Returns:
+            The new rows and columns of the agents.
+
+        """
+        rows = rows - ((actions == 0) & (rows > 0)) +\
+            ((actions == 1) & (rows + 1 < self._height))
+        columns = columns - ((actions == 2) & (columns > 0)) +\
+            ((actions == 3) & (columns + 1 < self._width))
+
+        return rows, columns
+
     @staticmethod
     def convert_to_grid(state, width):
         return np.array([state[0] / width, state[0] % width])
@@ -86,6 +139,14 @@ class GridWorld(AbstractGridWorld):
 
         return state, reward, absorbing, {}
 
+    def _vector_step(self, rows, columns, actions):
+        rows, columns = self._vector_move(rows, columns, actions)
+
+        absorbing = (rows == self._goal[0]) & (columns == self._goal[1])
+        rewards = 10. * absorbing
+
+        return rows, columns, rewards, absorbing
+
 
 class GridWorldVanHasselt(AbstractGridWorld):
     def __init__(self, height=3, width=3, goal=(0, 2), start=(2, 0)):
@@ -124,6 +185,18 @@ class GridWorldVanHasselt(AbstractGridWorld):
 
         return state, reward, absorbing, {}
 
+    def _vector_step(self, rows, columns, actions):
+        absorbing = (rows == self._goal[0]) & (columns == self._goal[1])
+
+        new_rows, new_columns = self._vector_move(rows, columns, actions)
+        rows = np.where(absorbing, rows, new_rows)
+        columns = np.where(absorbing, columns, new_columns)
+
+        rewards = np.where(absorbing, 5.,
+                           np.random.choice([-12., 10.], size=rows.size))
+
+        return rows, columns, rewards, absorbing
+
 
 class GridWorldGenerator(AbstractGridWorld):
     def __init__(self, grid_map):
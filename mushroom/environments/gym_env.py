@@ -64,7 +64,8 @@ class Gym(Environment):
         if isinstance(space, gym_spaces.Discrete):
             return Discrete(space.n)
         elif isinstance(space, gym_spaces.Box):
-            return Box(low=space.low, high=space.high, shape=space.shape)
+            return Box(low=space.low, high=space.high, shape=space.shape,
+                       dtype=getattr(space, 'dtype', np.float32))
         else:
             raise ValueError
 
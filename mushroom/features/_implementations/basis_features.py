@@ -11,10 +11,16 @@ class BasisFeatures:
         else:
             x = x[0]
 
-        out = np.empty(self.size)
+        if x.ndim == 2:
+            out = np.empty((x.shape[0], self.size))
 
-        for i, bf in enumerate(self._basis):
-            out[i] = bf(x)
+            for i, bf in enumerate(self._basis):
+                out[:, i] = bf(x)
+        else:
+            out = np.empty(self.size)
+
+            for i, bf in enumerate(self._basis):
+                out[i] = bf(x)
 
         return out
 
@@ -13,7 +13,8 @@ class TensorflowFeatures:
 
     def __call__(self, x):
         if len(x.shape) == 1:
-            x = [x]
+            return self._sess.run(self._phi, feed_dict={self._x: [x]})[0]
+
         return self._sess.run(self._phi, feed_dict={self._x: x})
 
     @property
@@ -30,4 +31,4 @@ class TensorflowFeatures:
             bf = tensor_type._generate(x, parameters)
             basis_functions.append(bf)
 
-        return tf.concat(basis_functions, axis=0)
+        return tf.stack(basis_functions, axis=1)
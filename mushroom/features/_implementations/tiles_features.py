@@ -3,7 +3,20 @@ import numpy as np
 
 class TilesFeatures:
 
-    def __init__(self, tiles):
+    def __init__(self, tiles, sparse=False):
+        """
+        Constructor.
+
+        Args:
+            tiles ([object, list]): single object or list of tilings;
+            sparse (bool, False): whether to return the indexes of the active
+                tiles instead of the binary feature vector. A single state is
+                mapped to the array of the indexes of the tiles containing it,
+                a batch of states to a matrix with a column for each tiling,
+                where -1 marks the tilings not containing the state.
+
+        """
+        self.sparse = sparse
 
         if isinstance(tiles, list):
             self._tiles = tiles
@@ -20,16 +33,56 @@ class TilesFeatures:
         else:
             x = args[0]
 
-        out = np.zeros(self._size)
+        if self.sparse:
+            return self._get_indexes(x)
 
-        offset = 0
-        for tiling in self._tiles:
-            index = tiling(x)
+        if x.ndim == 2:
+            out = np.zeros((x.shape[0], self._size))
+
+            offset = 0
+            for tiling in self._tiles:
+                index = tiling.get_indexes(x)
+                valid = np.flatnonzero(index >= 0)
+                out[valid, index[valid] + offset] = 1.
+
+                offset += tiling.size
+        else:
+            out = np.zeros(self._size)
+
+            offset = 0
+            for tiling in self._tiles:
+                index = tiling(x)
+
+                if index is not None:
+                    out[index + offset] = 1.
+
+                offset += tiling.size
+
+        return out
+
+    def _get_indexes(self, x):
+        if x.ndim == 2:
+            out = np.empty((x.shape[0], len(self._tiles)), dtype=np.int)
+
+            offset = 0
+            for i, tiling in enumerate(self._tiles):
+                index = tiling.get_indexes(x)
+                out[:, i] = np.where(index >= 0, index + offset, -1)
+
+                offset += tiling.size
+        else:
+            out = list()
+
+            offset = 0
+            for tiling in self._tiles:
+                index = tiling(x)
+
+                if index is not None:
+                    out.append(index + offset)
 
-            if index is not None:
-                out[index + offset] = 1.
+                offset += tiling.size
 
-            offset += tiling.size
+            out = np.array(out, dtype=np.int)
 
         return out
 
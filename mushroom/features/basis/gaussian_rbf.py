@@ -31,9 +31,9 @@ class GaussianRBF:
 
     def __call__(self, x):
         if self._dim is not None:
-            x = x[self._dim]
+            x = x[..., self._dim]
 
-        return np.exp(-np.sum((x - self._mean)**2 / self._scale))
+        return np.exp(-np.sum((x - self._mean)**2 / self._scale, axis=-1))
 
     def __str__(self):
         name = 'GaussianRBF ' + str(self._mean) + ' ' + str(self._scale)
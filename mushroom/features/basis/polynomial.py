@@ -36,7 +36,7 @@ class PolynomialBasis:
 
         out = 1
         for i, d in zip(self._dim, self._deg):
-            out *= x[i]**d
+            out *= x[..., i]**d
 
         return out
 
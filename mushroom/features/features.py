@@ -6,7 +6,7 @@ from ._implementations.tensorflow_features import TensorflowFeatures
 
 
 def Features(basis_list=None, tilings=None, tensor_list=None, name=None,
-             input_dim=None):
+             input_dim=None, sparse=False):
     """
     Factory method to build the requested type of features. The types are
     mutually exclusive.
@@ -19,6 +19,10 @@ def Features(basis_list=None, tilings=None, tensor_list=None, name=None,
     of the requested features is slow (see the Gaussian radial basis function
     implementation as an example).
 
+    All the returned features can be evaluated on a single state, returning
+    a feature vector, or on a batch of states stacked along the first axis,
+    returning one feature vector per row.
+
     Args:
         basis_list (list, None): list of basis functions;
         tilings ([object, list], None): single object or list of tilings;
@@ -27,7 +31,10 @@ def Features(basis_list=None, tilings=None, tensor_list=None, name=None,
         name (str, None): name of the group of tensors. Only needed when
             using a list of tensors;
         input_dim (int, None): the dimension of the input state. Only needed
-            when using a list of tensors.
+            when using a list of tensors;
+        sparse (bool, False): whether to return the indexes of the active
+            features instead of the feature vector. Only supported when using
+            tilings.
 
     Returns:
         The class implementing the requested type of features.
@@ -36,7 +43,7 @@ def Features(basis_list=None, tilings=None, tensor_list=None, name=None,
     if basis_list is not None and tilings is None and tensor_list is None:
         return BasisFeatures(basis_list)
     elif basis_list is None and tilings is not None and tensor_list is None:
-        return TilesFeatures(tilings)
+        return TilesFeatures(tilings, sparse)
     elif basis_list is None and tilings is None and tensor_list is not None:
         return TensorflowFeatures(name, input_dim, tensor_list)
     else:
@@ -63,18 +70,12 @@ def get_action_features(phi_state, action, n_actions):
     if len(phi_state.shape) > 1:
         assert phi_state.shape[0] == action.shape[0]
 
-        phi = np.ones((phi_state.shape[0], n_actions * phi_state[0].size))
-        i = 0
-        for s, a in zip(phi_state, action):
-            start = s.size * int(a[0])
-            stop = start + s.size
-
-            phi_sa = np.zeros(n_actions * s.size)
-            phi_sa[start:stop] = s
-
-            phi[i] = phi_sa
+        n_samples, size = phi_state.shape
+        start = size * action[:, 0].astype(np.int)
 
-            i += 1
+        phi = np.zeros((n_samples, n_actions * size))
+        phi[np.arange(n_samples)[:, None],
+            start[:, None] + np.arange(size)] = phi_state
     else:
         start = phi_state.size * action[0]
         stop = start + phi_state.size
@@ -62,6 +62,36 @@ class Tiles:
 
         return tile_index
 
+    def get_indexes(self, x):
+        """
+        Compute the index of the tile of each point in a batch.
+
+        Args:
+            x (np.ndarray): the points, stacked along the first axis.
+
+        Returns:
+            The array of the tile indexes. Points outside the tiling have index
+            -1.
+
+        """
+        if self._state_components is not None:
+            x = x[:, self._state_components]
+
+        multiplier = 1
+        tile_index = np.zeros(x.shape[0], dtype=np.int)
+        valid = np.ones(x.shape[0], dtype=np.bool)
+
+        for i, (r, N) in enumerate(zip(self._range, self._n_tiles)):
+            valid &= (r[0] <= x[:, i]) & (x[:, i] < r[1])
+            width = r[1] - r[0]
+            component_index = np.floor(N * (x[:, i] - r[0]) / width)
+            tile_index += component_index.astype(np.int) * multiplier
+            multiplier *= N
+
+        tile_index[~valid] = -1
+
+        return tile_index
+
     @staticmethod
     def generate(n_tilings, n_tiles, low, high):
         assert len(n_tiles) == len(low) == len(high)
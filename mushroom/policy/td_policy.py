@@ -40,6 +40,20 @@ class TDPolicy(object):
         """
         raise NotImplementedError
 
+    def draw_actions(self, states):
+        """
+        Sample an action in each state of `states` using the policy.
+
+        Args:
+            states (np.ndarray): the states where the agents are, stacked along
+                the first axis.
+
+        Returns:
+            The actions sampled from the policy, stacked along the first axis.
+
+        """
+        return np.array([self.draw_action(s) for s in states])
+
     def set_q(self, approximator):
         """
         Args:
@@ -113,6 +127,49 @@ class EpsGreedy(TDPolicy):
 
         return np.array([np.random.choice(self._approximator.n_actions)])
 
+    def draw_actions(self, states):
+        n_actions = self._approximator.n_actions
+        if self._distinct_entries(states):
+            explore = np.random.uniform(size=len(states)) < self._epsilon(
+                states)
+        else:
+            explore = np.array([np.random.uniform() < self._epsilon(s)
+                                for s in states])
+        greedy = np.argwhere(~explore).ravel()
+
+        actions = np.empty((len(states), 1), dtype=np.int)
+        actions[explore, 0] = np.random.randint(n_actions,
+                                                size=np.sum(explore))
+        if greedy.size:
+            q = self._approximator.predict(states[greedy]).reshape(
+                greedy.size, n_actions)
+            max_q = q == np.max(q, axis=1, keepdims=True)
+
+            # Ties are broken uniformly at random among the maximizers
+            ties = np.random.uniform(size=q.shape) * max_q
+            actions[greedy, 0] = np.argmax(ties, axis=1)
+
+        return actions
+
+    def _distinct_entries(self, states):
+        """
+        Args:
+            states (np.ndarray): the states where the agents are, stacked along
+                the first axis.
+
+        Returns:
+            Whether the states use distinct entries of the exploration
+            coefficient, so that it can be evaluated and updated once for the
+            whole batch, counting an update for each state.
+
+        """
+        if self._epsilon.shape == (1,) or len(states) < 2:
+            return False
+
+        s = states[np.lexsort(states.T[::-1])]
+
+        return not np.any(np.all(s[1:] == s[:-1], axis=1))
+
     def set_epsilon(self, epsilon):
         """
         Setter.
@@ -3,6 +3,7 @@ from copy import deepcopy
 import numpy as np
 
 from mushroom.approximators import EnsembleTable
+from mushroom.utils.dataset import Dataset
 
 
 class CollectDataset:
@@ -16,14 +17,14 @@ class CollectDataset:
         Constructor.
 
         """
-        self._dataset = list()
+        self._dataset = Dataset()
 
     def __call__(self, dataset):
         """
-        Add samples to the samples list.
+        Add samples to the samples dataset.
 
         Args:
-            dataset (list): the samples to collect.
+            dataset ([list, Dataset]): the samples to collect.
 
         """
         self._dataset += dataset
@@ -33,7 +34,7 @@ class CollectDataset:
         Getter.
 
         Returns:
-             The current samples list.
+             The current samples dataset.
 
         """
         return self._dataset
@@ -1,13 +1,363 @@
+from numbers import Integral
+
+import h5py
 import numpy as np
 
 
+class Dataset(object):
+    """
+    This class implements a container of samples where each component of the
+    samples (state, action, reward, next state, absorbing flag and last step
+    flag) is stored in its own preallocated numpy array, growing when needed.
+    The indexes of the last step of each episode are tracked while adding
+    samples.
+
+    A `Dataset` behaves as the list of tuples
+    (state, action, reward, next_state, absorbing, last) previously used to
+    store samples: it has a length, it can be iterated and indexing it with an
+    integer returns the tuple of the corresponding sample. Indexing it with a
+    slice or an array of indexes returns a new `Dataset`.
+
+    """
+    def __init__(self, capacity=1000):
+        """
+        Constructor.
+
+        Args:
+            capacity (int, 1000): the number of samples to preallocate. The
+                arrays are allocated when the first sample is added, since
+                shapes and types are inferred from it.
+
+        """
+        self._capacity = max(capacity, 1)
+        self._size = 0
+
+        self._allocated = False
+        self._states = np.empty(0)
+        self._actions = np.empty(0)
+        self._rewards = np.empty(0)
+        self._next_states = np.empty(0)
+        self._absorbing = np.empty(0, dtype=np.bool)
+        self._last = np.empty(0, dtype=np.bool)
+
+        self._episode_ends = list()
+
+    @staticmethod
+    def from_list(dataset):
+        """
+        Build a `Dataset` from a list of samples.
+
+        Args:
+            dataset ([list, Dataset]): the samples to store. If a `Dataset` is
+                provided, it is returned as it is.
+
+        Returns:
+            The `Dataset` containing the provided samples.
+
+        """
+        if isinstance(dataset, Dataset):
+            return dataset
+
+        d = Dataset(len(dataset))
+        d.extend(dataset)
+
+        return d
+
+    def append(self, sample):
+        """
+        Add a sample to the dataset.
+
+        Args:
+            sample (tuple): the tuple
+                (state, action, reward, next_state, absorbing, last) to add.
+
+        """
+        state, action, reward, next_state, absorbing, last = sample
+
+        if not self._allocated:
+            self._allocate(state, action, next_state)
+        elif self._size == self._capacity:
+            self._grow(max(2 * self._capacity, 1))
+
+        i = self._size
+        self._states[i] = state
+        self._actions[i] = action
+        self._rewards[i] = reward
+        self._next_states[i] = next_state
+        self._absorbing[i] = absorbing
+        self._last[i] = last
+
+        if last:
+            self._episode_ends.append(i)
+
+        self._size += 1
+
+    def extend(self, dataset):
+        """
+        Add several samples to the dataset.
+
+        Args:
+            dataset ([list, Dataset]): the samples to add.
+
+        """
+        if not isinstance(dataset, Dataset):
+            for sample in dataset:
+                self.append(sample)
+
+            return
+
+        if len(dataset) == 0:
+            return
+
+        if not self._allocated:
+            self._allocate(dataset.state[0], dataset.action[0],
+                           dataset.next_state[0])
+
+        start = self._size
+        stop = start + len(dataset)
+        if stop > self._capacity:
+            self._grow(max(stop, 2 * self._capacity))
+
+        self._states[start:stop] = dataset.state
+        self._actions[start:stop] = dataset.action
+        self._rewards[start:stop] = dataset.reward
+        self._next_states[start:stop] = dataset.next_state
+        self._absorbing[start:stop] = dataset.absorbing
+        self._last[start:stop] = dataset.last
+
+        self._episode_ends += list(dataset.episode_ends + start)
+        self._size = stop
+
+    def _allocate(self, state, action, next_state):
+        state = np.asarray(state)
+        next_state = np.asarray(next_state)
+        action = np.asarray(action)
+        state_type = np.result_type(state, next_state)
+
+        self._states = np.empty((self._capacity,) + state.shape,
+                                dtype=state_type)
+        self._actions = np.empty((self._capacity,) + action.shape,
+                                 dtype=action.dtype)
+        self._rewards = np.empty(self._capacity)
+        self._next_states = np.empty((self._capacity,) + next_state.shape,
+                                     dtype=state_type)
+        self._absorbing = np.empty(self._capacity, dtype=np.bool)
+        self._last = np.empty(self._capacity, dtype=np.bool)
+        self._allocated = True
+
+    def _grow(self, capacity):
+        def grow(x):
+            y = np.empty((capacity,) + x.shape[1:], dtype=x.dtype)
+            y[:self._size] = x[:self._size]
+
+            return y
+
+        self._states = grow(self._states)
+        self._actions = grow(self._actions)
+        self._rewards = grow(self._rewards)
+        self._next_states = grow(self._next_states)
+        self._absorbing = grow(self._absorbing)
+        self._last = grow(self._last)
+        self._capacity = capacity
+
+    def _subset(self, idx):
+        d = Dataset(1)
+        d._allocated = self._allocated
+        d._states = self.state[idx]
+        d._actions = self.action[idx]
+        d._rewards = self.reward[idx]
+        d._next_states = self.next_state[idx]
+        d._absorbing = self.absorbing[idx]
+        d._last = self.last[idx]
+        d._size = d._capacity = d._rewards.shape[0]
+        d._episode_ends = list(np.flatnonzero(d._last))
+
+        return d
+
+    def parse(self):
+        """
+        Returns:
+            The arrays of state, action, reward, next_state, absorbing flag and
+            last step flag of the samples in the dataset.
+
+        """
+        return self.state, self.action, self.reward, self.next_state,\
+            self.absorbing, self.last
+
+    @property
+    def state(self):
+        return self._states[:self._size]
+
+    @property
+    def action(self):
+        return self._actions[:self._size]
+
+    @property
+    def reward(self):
+        return self._rewards[:self._size]
+
+    @property
+    def next_state(self):
+        return self._next_states[:self._size]
+
+    @property
+    def absorbing(self):
+        return self._absorbing[:self._size]
+
+    @property
+    def last(self):
+        return self._last[:self._size]
+
+    @property
+    def episode_ends(self):
+        """
+        Returns:
+             the indexes of the last step of each episode in the dataset.
+
+        """
+        return np.array(self._episode_ends, dtype=np.int)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, Integral):
+            if idx < 0:
+                idx += self._size
+            if not 0 <= idx < self._size:
+                raise IndexError('Dataset index out of range.')
+
+            return self._states[idx], self._actions[idx], self._rewards[idx],\
+                self._next_states[idx], self._absorbing[idx], self._last[idx]
+        else:
+            return self._subset(idx)
+
+    def __iter__(self):
+        for i in xrange(self._size):
+            yield self[i]
+
+    def __iadd__(self, dataset):
+        self.extend(dataset)
+
+        return self
+
+    def __add__(self, dataset):
+        d = Dataset(len(self) + len(dataset))
+        d.extend(self)
+        d.extend(dataset)
+
+        return d
+
+
+class HDF5Dataset(object):
+    """
+    This class implements a container of samples stored on disk in an HDF5
+    file, with a resizable column for each component of the samples. It is
+    used to collect and to process datasets that do not fit in memory: the
+    columns are read only in the requested slices, e.g. by the out-of-core
+    mode of `FQI`.
+
+    """
+    _columns = ['state', 'action', 'reward', 'next_state', 'absorbing',
+                'last']
+
+    def __init__(self, path, mode='a'):
+        """
+        Constructor.
+
+        Args:
+            path (str): the path of the HDF5 file. If the file already
+                contains a dataset, the new samples are appended to it;
+            mode (str, 'a'): the mode used to open the file.
+
+        """
+        self._file = h5py.File(path, mode)
+
+    def extend(self, dataset):
+        """
+        Add the samples of a dataset to the file.
+
+        Args:
+            dataset ([list, Dataset]): the samples to add.
+
+        """
+        if len(dataset) == 0:
+            return
+
+        dataset = Dataset.from_list(dataset)
+        n_samples = len(dataset)
+
+        for name in self._columns:
+            x = getattr(dataset, name)
+
+            if name not in self._file:
+                self._file.create_dataset(name, shape=(0,) + x.shape[1:],
+                                          maxshape=(None,) + x.shape[1:],
+                                          dtype=x.dtype, chunks=True)
+
+            column = self._file[name]
+            column.resize(column.shape[0] + n_samples, axis=0)
+            column[-n_samples:] = x
+
+    def chunks(self, chunk_size):
+        """
+        Split the dataset in contiguous chunks.
+
+        Args:
+            chunk_size (int): the maximum number of samples of each chunk.
+
+        Returns:
+            The list of the (start, stop) indexes of the chunks.
+
+        """
+        return [(start, min(start + chunk_size, len(self)))
+                for start in xrange(0, len(self), chunk_size)]
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def state(self):
+        return self._file['state']
+
+    @property
+    def action(self):
+        return self._file['action']
+
+    @property
+    def reward(self):
+        return self._file['reward']
+
+    @property
+    def next_state(self):
+        return self._file['next_state']
+
+    @property
+    def absorbing(self):
+        return self._file['absorbing']
+
+    @property
+    def last(self):
+        return self._file['last']
+
+    def __len__(self):
+        if 'reward' in self._file:
+            return self._file['reward'].shape[0]
+        else:
+            return 0
+
+
 def parse_dataset(dataset, features=None):
     """
     Split the dataset in its different components and return them.
 
     Args:
-        dataset (list): the dataset to parse;
-        features (object, None): features to apply to the states.
+        dataset ([list, Dataset]): the dataset to parse;
+        features (object, None): features to apply to the states. They are
+            evaluated once on the whole batch of states and of next states.
 
     Returns:
         The np.array of state, action, reward, next_state, absorbing flag and
@@ -17,55 +367,61 @@ def parse_dataset(dataset, features=None):
     """
     assert len(dataset) > 0
 
-    shape = dataset[0][0].shape if features is None else (features.size,)
-
-    state = np.ones((len(dataset),) + shape)
-    action = np.ones((len(dataset),) + dataset[0][1].shape)
-    reward = np.ones(len(dataset))
-    next_state = np.ones((len(dataset),) + shape)
-    absorbing = np.ones(len(dataset))
-    last = np.ones(len(dataset))
+    dataset = Dataset.from_list(dataset)
 
     if features is not None:
-        for i in xrange(len(dataset)):
-            state[i, ...] = features(dataset[i][0])
-            action[i, ...] = dataset[i][1]
-            reward[i] = dataset[i][2]
-            next_state[i, ...] = features(dataset[i][3])
-            absorbing[i] = dataset[i][4]
-            last[i] = dataset[i][5]
+        state = features(dataset.state)
+        next_state = features(dataset.next_state)
     else:
-        for i in xrange(len(dataset)):
-            state[i, ...] = dataset[i][0]
-            action[i, ...] = dataset[i][1]
-            reward[i] = dataset[i][2]
-            next_state[i, ...] = dataset[i][3]
-            absorbing[i] = dataset[i][4]
-            last[i] = dataset[i][5]
+        state = dataset.state.astype(np.float, copy=False)
+        next_state = dataset.next_state.astype(np.float, copy=False)
+
+    action = dataset.action.astype(np.float, copy=False)
+    reward = dataset.reward
+    absorbing = dataset.absorbing.astype(np.float)
+    last = dataset.last.astype(np.float)
+
+    return state, action, reward, next_state, absorbing, last
 
-    return np.array(state), np.array(action), np.array(reward), np.array(
-        next_state), np.array(absorbing), np.array(last)
+
+def get_episodes_index(dataset):
+    """
+    Find the boundaries of the complete episodes in the dataset, using the last
+    step flags. The result can be provided to the functions computing
+    statistics of the episodes, such that the boundaries are found only once.
+
+    Args:
+        dataset ([list, Dataset]): the dataset to consider.
+
+    Returns:
+        The arrays of the indexes of the first and of the last step of each
+        complete episode in the dataset. The samples of a trailing episode not
+        completed yet are ignored, and both arrays are empty if no episode is
+        completed.
+
+    """
+    last = np.flatnonzero(Dataset.from_list(dataset).last) if len(
+        dataset) > 0 else np.zeros(0, dtype=np.int)
+    first = np.concatenate(([0], last + 1))[:last.size].astype(np.int)
+
+    return first, last
 
 
-def mean_episode_length(dataset):
+def mean_episode_length(dataset, episodes_index=None):
     """
     Compute the mean length of an episode in the dataset.
 
     Args:
-        dataset (list): the dataset to consider.
+        dataset ([list, Dataset]): the dataset to consider;
+        episodes_index (tuple, None): the boundaries of the episodes, as
+            returned by `get_episodes_index`. Computed if not provided.
 
     Returns:
         The mean length of an episode in the dataset.
     """
-    lengths = list()
-    l = 0
-    for sample in dataset:
-        l += 1
-        if sample[-1] == 1:
-            lengths.append(l)
-            l = 0
+    first, last = _episodes_index(dataset, episodes_index)
 
-    return np.mean(lengths)
+    return np.mean(last - first + 1)
 
 
 def select_episodes(dataset, n_episodes, parse=False):
@@ -73,7 +429,7 @@ def select_episodes(dataset, n_episodes, parse=False):
     Return the first `n_episodes` episodes in the provided dataset.
 
     Args:
-        dataset (list): the dataset to consider;
+        dataset ([list, Dataset]): the dataset to consider;
         n_episodes (int): the number of episodes to pick from the dataset;
         parse (bool): whether to parse the dataset to return.
 
@@ -86,9 +442,9 @@ def select_episodes(dataset, n_episodes, parse=False):
     if n_episodes == 0:
         return np.array([[]])
 
-    dataset = np.array(dataset)
-    last_idxs = np.argwhere(dataset[:, -1] == 1).ravel()
-    sub_dataset = dataset[:last_idxs[n_episodes - 1] + 1, :]
+    dataset = Dataset.from_list(dataset)
+    last_idxs = dataset.episode_ends
+    sub_dataset = dataset[:last_idxs[n_episodes - 1] + 1]
 
     return sub_dataset if not parse else parse_dataset(sub_dataset)
 
@@ -99,7 +455,7 @@ def select_samples(dataset, n_samples, parse=False):
     dataset.
 
     Args:
-        dataset (list): the dataset to consider;
+        dataset ([list, Dataset]): the dataset to consider;
         n_samples (int): the number of samples to pick from the dataset;
         parse (bool): whether to parse the dataset to return.
 
@@ -112,47 +468,50 @@ def select_samples(dataset, n_samples, parse=False):
     if n_samples == 0:
         return np.array([[]])
 
-    dataset = np.array(dataset)
-    idxs = np.random.randint(dataset.shape[0], size=n_samples)
-    sub_dataset = dataset[idxs, ...]
+    dataset = Dataset.from_list(dataset)
+    idxs = np.random.randint(len(dataset), size=n_samples)
+    sub_dataset = dataset[idxs]
 
     return sub_dataset if not parse else parse_dataset(sub_dataset)
 
 
-def compute_J(dataset, gamma=1.):
+def compute_J(dataset, gamma=1., episodes_index=None):
     """
     Compute the cumulative discounted reward of each episode in the dataset.
 
     Args:
-        dataset (list): the dataset to consider;
-        gamma (float, 1.): discount factor.
+        dataset ([list, Dataset]): the dataset to consider;
+        gamma (float, 1.): discount factor;
+        episodes_index (tuple, None): the boundaries of the episodes, as
+            returned by `get_episodes_index`. Computed if not provided.
 
     Returns:
         The cumulative discounted reward of each episode in the dataset.
 
     """
-    js = list()
+    dataset = Dataset.from_list(dataset)
+    first, last = _episodes_index(dataset, episodes_index)
+    if last.size == 0:
+        return list()
 
-    j = 0.
-    episode_steps = 0
-    for i in xrange(len(dataset)):
-        j += gamma ** episode_steps * dataset[i][2]
-        episode_steps += 1
-        if dataset[i][-1]:
-            js.append(j)
-            j = 0.
-            episode_steps = 0
+    lengths = last - first + 1
+    steps = np.arange(last[-1] + 1) - np.repeat(first, lengths)
+    discount = gamma ** np.arange(np.max(lengths), dtype=np.float)
 
-    return js
+    reward = dataset.reward[:last[-1] + 1] * discount[steps]
 
+    return list(np.add.reduceat(reward, first))
 
-def compute_scores(dataset):
+
+def compute_scores(dataset, episodes_index=None):
     """
     Compute the scores of each episode in the dataset. This is meant to be used
     for the Atari environments.
 
     Args:
-        dataset (list): the dataset to consider.
+        dataset ([list, Dataset]): the dataset to consider;
+        episodes_index (tuple, None): the boundaries of the episodes, as
+            returned by `get_episodes_index`. Computed if not provided.
 
     Returns:
         The minimum score reached in an episode,
@@ -163,21 +522,17 @@ def compute_scores(dataset):
         If no game has been completed, it returns 0 for all values.
 
     """
-    scores = list()
+    dataset = Dataset.from_list(dataset)
+    first, last = _episodes_index(dataset, episodes_index)
 
-    score = 0.
-    episode_steps = 0
-    n_episodes = 0
-    for i in xrange(len(dataset)):
-        score += dataset[i][2]
-        episode_steps += 1
-        if dataset[i][-1]:
-            scores.append(score)
-            score = 0.
-            episode_steps = 0
-            n_episodes += 1
+    if last.size > 0:
+        scores = np.add.reduceat(dataset.reward[:last[-1] + 1], first)
 
-    if len(scores) > 0:
-        return np.min(scores), np.max(scores), np.mean(scores), n_episodes
+        return np.min(scores), np.max(scores), np.mean(scores), last.size
     else:
         return 0, 0, 0, 0
+
+
+def _episodes_index(dataset, episodes_index):
+    return get_episodes_index(dataset) if episodes_index is None\
+        else episodes_index
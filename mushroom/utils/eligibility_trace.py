@@ -1,45 +1,204 @@
-from mushroom.utils.table import Table
+import numpy as np
 
 
-def EligibilityTrace(shape, name='replacing'):
+def EligibilityTrace(shape, name='replacing', cutoff=1e-8):
     """
     Factory method to create an eligibility trace of the provided type.
 
     Args:
         shape (list): shape of the eligibility trace table;
-        name (str, 'replacing'): type of the eligibility trace.
+        name (str, 'replacing'): type of the eligibility trace;
+        cutoff (float, 1e-8): value under which the entries of the trace are
+            dropped.
 
     Returns:
         The eligibility trace table of the provided shape and type.
 
     """
     if name == 'replacing':
-        return ReplacingTrace(shape)
+        return ReplacingTrace(shape, cutoff)
     elif name == 'accumulating':
-        return AccumulatingTrace(shape)
+        return AccumulatingTrace(shape, cutoff)
     else:
         raise ValueError('Unknown type of trace.')
 
 
-class ReplacingTrace(Table):
+class SparseTrace(object):
     """
-    Replacing trace.
+    Eligibility trace storing only the entries greater than a cutoff value,
+    so that its updates scale with the number of recently visited
+    state-action pairs instead of the size of the table. The decay is folded
+    in lazily: the entries are stored divided by a common scale factor, which
+    is the only value multiplied at each decay. The position of each entry is
+    tracked in a table of the size of the trace, to find the entries without
+    searching them.
 
     """
+    def __init__(self, shape, cutoff=1e-8):
+        """
+        Constructor.
+
+        Args:
+            shape (list): shape of the eligibility trace table;
+            cutoff (float, 1e-8): value under which the entries of the trace
+                are dropped.
+
+        """
+        self.shape = tuple(shape)
+        self._cutoff = cutoff
+
+        self._idxs = np.zeros(0, dtype=np.int)
+        self._pos = -np.ones(np.prod(self.shape), dtype=np.int)
+
+        self.reset()
+
     def reset(self):
-        self.table[:] = 0.
+        self._pos[self._idxs] = -1
+        self._idxs = np.zeros(0, dtype=np.int)
+        self._values = np.zeros(0)
+        self._scale = 1.
 
     def update(self, state, action):
-        self.table[state, action] = 1.
+        """
+        Update the trace of the provided state-action pair.
+
+        Args:
+            state (np.ndarray): the state;
+            action (np.ndarray): the action.
+
+        """
+        idx = np.ravel_multi_index(
+            tuple([a[0] if isinstance(a, np.ndarray) else a
+                   for a in (state, action)]), self.shape)
+
+        pos = self._pos[idx]
+        if pos < 0:
+            pos = self._values.size
+            self._pos[idx] = pos
+            self._idxs = np.append(self._idxs, idx)
+            self._values = np.append(self._values, 0.)
+
+        self._values[pos] = self._update_value(self._values[pos] * self._scale
+                                               ) / self._scale
+
+    def add_to(self, table, coefficient):
+        """
+        Add the trace, multiplied by a coefficient, to a table of the same
+        shape.
+
+        Args:
+            table (np.ndarray): the table to update;
+            coefficient (float): the coefficient of the trace.
+
+        """
+        table.flat[self._idxs] += coefficient * self._scale * self._values
+
+    def add(self, idxs, value):
+        """
+        Add a value to the entries of the trace with the provided flat
+        indexes.
+
+        Args:
+            idxs (np.ndarray): the unique flat indexes of the entries;
+            value (float): the value to add.
+
+        """
+        pos = self._pos[idxs]
+        new = pos < 0
+        self._values[pos[~new]] += value / self._scale
+
+        new_idxs = idxs[new]
+        self._pos[new_idxs] = np.arange(new_idxs.size) + self._values.size
+        self._idxs = np.append(self._idxs, new_idxs)
+        self._values = np.append(self._values,
+                                 np.ones(new_idxs.size) * value / self._scale)
+
+    def dot(self, idxs):
+        """
+        Compute the dot product of the trace with a binary vector.
+
+        Args:
+            idxs (np.ndarray): the unique flat indexes of the ones of the
+                vector.
+
+        Returns:
+            The sum of the entries of the trace with the provided indexes.
+
+        """
+        pos = self._pos[idxs]
+
+        return self._scale * np.sum(self._values[pos[pos >= 0]])
 
+    def decay(self, factor):
+        """
+        Multiply the trace by a factor, dropping the entries that become
+        smaller than the cutoff.
 
-class AccumulatingTrace(Table):
+        Args:
+            factor (float): the decay factor.
+
+        """
+        self._scale *= factor
+
+        keep = np.abs(self._values) * self._scale >= self._cutoff
+        if not np.all(keep):
+            self._pos[self._idxs[~keep]] = -1
+            self._idxs = self._idxs[keep]
+            self._values = self._values[keep]
+            self._pos[self._idxs] = np.arange(self._idxs.size)
+
+        # The stored values grow as the scale shrinks, so they are
+        # renormalized before they can overflow.
+        if self._scale < 1e-100:
+            self._values *= self._scale
+            self._scale = 1.
+
+    @property
+    def table(self):
+        """
+        Returns:
+             the dense table of the trace.
+
+        """
+        table = np.zeros(self.shape)
+        table.flat[self._idxs] = self._scale * self._values
+
+        return table
+
+    @property
+    def entries(self):
+        """
+        Returns:
+             the flat indexes and the values of the entries of the trace.
+
+        """
+        return self._idxs, self._scale * self._values
+
+    def _update_value(self, value):
+        """
+        Args:
+            value (float): the current value of the updated entry.
+
+        Returns:
+            The new value of the updated entry.
+
+        """
+        raise NotImplementedError
+
+
+class ReplacingTrace(SparseTrace):
     """
-    Accumulating trace.
+    Replacing trace.
 
     """
-    def reset(self):
-        self.table[:] = 0.
+    def _update_value(self, value):
+        return 1.
 
-    def update(self, state, action):
-        self.table[state, action] += 1.
+
+class AccumulatingTrace(SparseTrace):
+    """
+    Accumulating trace.
+
+    """
+    def _update_value(self, value):
+        return value + 1.
@@ -19,10 +19,10 @@ class Parameter(object):
     def get_value(self, *idx, **kwargs):
         new_value = self._compute(*idx, **kwargs)
 
-        if self._min_value is None or new_value >= self._min_value:
+        if self._min_value is None or np.all(new_value >= self._min_value):
             return new_value
         else:
-            return self._min_value
+            return np.maximum(new_value, self._min_value)
 
     def _compute(self, *idx, **kwargs):
         return self._initial_value
@@ -1,5 +1,16 @@
+import ctypes
+import json
+import multiprocessing as mp
+import os
+import threading
+from Queue import Queue, Full
+
 import numpy as np
 
+from mushroom.utils.dataset import Dataset
+from mushroom.utils.folder import mk_dir_recursive
+from mushroom.utils.parameters import Parameter
+
 
 class Buffer(object):
     """
@@ -16,11 +27,7 @@ class Buffer(object):
         self._buf = self._buf[1:]
 
     def get(self):
-        s = np.empty(self._buf[0].shape + (self._size,), dtype=np.float32)
-        for i in xrange(self._size):
-            s[..., i] = self._buf[i]
-
-        return s
+        return np.stack(self._buf, axis=-1).astype(np.float32)
 
     @property
     def size(self):
@@ -33,43 +40,107 @@ class ReplayMemory(object):
     "Human-Level Control Through Deep Reinforcement Learning" by Mnih V. et al..
 
     """
-    def __init__(self, mdp_info, initial_size, max_size, history_length=1):
+    def __init__(self, mdp_info, initial_size, max_size, history_length=1,
+                 n_step=1, clip_reward=False):
+        """
+        Constructor.
+
+        Args:
+            mdp_info (MDPInfo): information about the MDP. States and actions
+                are stored with the type of the observation and action spaces
+                (e.g. np.uint8 frames and integer indexes of discrete actions);
+            initial_size (int): number of samples needed to consider the
+                memory initialized;
+            max_size (int): maximum number of samples in the memory;
+            history_length (int, 1): number of consecutive states composing a
+                state returned by the memory;
+            n_step (int, 1): number of steps of the returns provided by the
+                memory. When greater than 1, the sampled rewards are the
+                discounted sums of the rewards of up to `n_step` consecutive
+                transitions and the memory also returns the number of summed
+                rewards;
+            clip_reward (bool, False): whether to clip in [-1, 1] each reward
+                summed in the n-step returns.
+
+        """
         self._initial_size = initial_size
         self._max_size = max_size
         self._history_length = history_length
-        self._idx = 0
-        self._full = False
+        self._n_step = n_step
+        self._clip_reward = clip_reward
+        self._gamma = mdp_info.gamma
 
         self._observation_shape = tuple(
             [self._max_size]) + mdp_info.observation_space.shape
+        self._observation_type = mdp_info.observation_space.dtype
         self._action_shape = (self._max_size, mdp_info.action_space.shape[0])
+        self._action_type = mdp_info.action_space.dtype
 
-        self._states = np.ones(self._observation_shape, dtype=np.float32)
-        self._actions = np.ones(self._action_shape, dtype=np.float32)
-        self._rewards = np.ones(self._max_size, dtype=np.float32)
-        self._absorbing = np.ones(self._max_size, dtype=np.bool)
-        self._last = np.ones(self._max_size, dtype=np.bool)
+        self.reset()
 
     def add(self, dataset):
-        for i in xrange(len(dataset)):
-            self._states[self._idx, ...] = dataset[i][0]
-            self._actions[self._idx, ...] = dataset[i][1]
-            self._rewards[self._idx, ...] = dataset[i][2]
-            self._absorbing[self._idx, ...] = dataset[i][4]
-            self._last[self._idx, ...] = dataset[i][5]
-
-            self._idx += 1
-            if self._idx == self._max_size:
-                self._full = True
-                self._idx = 0
+        dataset = Dataset.from_list(dataset)
 
-    def get(self, n_samples):
-        idxs = np.random.randint(self.size, size=n_samples)
+        n_samples = len(dataset)
+        if n_samples == 0:
+            return
+        idxs, samples = self._insert_idxs(n_samples)
+
+        self._states[idxs, ...] = dataset.state[samples]
+        self._actions[idxs, ...] = dataset.action[samples]
+        self._rewards[idxs, ...] = dataset.reward[samples]
+        self._absorbing[idxs, ...] = dataset.absorbing[samples]
+        self._last[idxs, ...] = dataset.last[samples]
+
+        if self._idx + n_samples >= self._max_size:
+            self._full = True
+        self._idx = (self._idx + n_samples) % self._max_size
+
+    def _insert_idxs(self, n_samples):
+        """
+        Args:
+            n_samples (int): the number of samples to add.
+
+        Returns:
+            The positions in the memory where the samples are written and the
+            slice of the samples that fit in the memory.
+
+        """
+        start = max(0, n_samples - self._max_size)
+        idxs = (self._idx + np.arange(start, n_samples)) % self._max_size
+
+        return idxs, slice(start, n_samples)
+
+    def get(self, n_samples, random_state=np.random):
+        """
+        Sample transitions uniformly from the memory, except the most recent
+        one, whose next state is not written yet.
+
+        Args:
+            n_samples (int): the number of transitions to sample;
+            random_state (np.random.RandomState, np.random): the random
+                number generator used to sample.
+
+        Returns:
+            The sampled state, action, reward, next_state, absorbing flag and
+            last step flag, followed by the number of summed rewards when
+            `n_step` is greater than 1.
+
+        """
+        if self._full:
+            idxs = self._valid_idxs(
+                random_state.randint(self._max_size - 1, size=n_samples))
+        else:
+            idxs = random_state.randint(self.size, size=n_samples)
 
         return self.get_idxs(idxs)
 
     def generator(self, batch_size, indexes=None):
-        indexes = np.arange(self.size) if indexes is None else indexes
+        if indexes is None:
+            if self._full:
+                indexes = self._valid_idxs(np.arange(self._max_size - 1))
+            else:
+                indexes = np.arange(self.size)
         n_batches = int(np.ceil(indexes.size / float(batch_size)))
         np.random.shuffle(indexes)
         batches = [(i * batch_size, min(indexes.size, (
@@ -77,41 +148,120 @@ class ReplayMemory(object):
         for (batch_start, batch_end) in batches:
             yield self.get_idxs(indexes[batch_start:batch_end])
 
+    def _valid_idxs(self, ages):
+        """
+        Find the indexes of the transitions of a full memory, skipping the
+        most recent one, whose next state is not written yet.
+
+        Args:
+            ages (np.ndarray): the positions of the transitions from the
+                oldest one, smaller than `max_size - 1`.
+
+        Returns:
+            The indexes of the transitions, to be provided to `get_idxs`.
+
+        """
+        return (self._idx + ages) % self._max_size + 1
+
     def get_idxs(self, idxs):
-        if not self._full and np.any(idxs < self._history_length):
-            idxs[np.argwhere(
-                idxs < self._history_length).ravel()] += self._history_length
+        if not self._full:
+            idxs[idxs < self._history_length] += self._history_length
+
+        s = self._get_state(idxs - 1).astype(np.float32)
 
-        s = self._get_state(idxs - 1)
-        ss = self._get_state(idxs)
+        if self._n_step > 1:
+            return (s, self._actions[idxs - 1, ...]) +\
+                self._get_n_step(idxs - 1)
+
+        ss = self._get_state(idxs).astype(np.float32)
 
         return s, self._actions[idxs - 1, ...], self._rewards[idxs - 1, ...],\
             ss, self._absorbing[idxs - 1, ...], self._last[idxs - 1, ...]
 
+    def _get_n_step(self, idxs):
+        """
+        Compute the n-step returns of a batch of transitions. The returns are
+        truncated at the first absorbing or last transition of the episode and
+        before the most recent transition in the memory, whose next state is
+        not written yet.
+
+        Args:
+            idxs (np.ndarray): the positions of the first transition of each
+                return.
+
+        Returns:
+            The discounted sums of the rewards, the states to bootstrap from,
+            the absorbing and last flags of the last summed transitions, and
+            the number of summed rewards.
+
+        """
+        steps = np.arange(self._n_step)
+        positions = (idxs.reshape(-1, 1) + steps) % self._max_size
+
+        available = (self._idx - 1 - idxs) % self._max_size
+        stop = self._absorbing[positions] | self._last[positions] |\
+            (steps >= available.reshape(-1, 1) - 1)
+        included = np.cumsum(stop, axis=1) - stop == 0
+
+        n_steps = np.sum(included, axis=1)
+        last_idxs = positions[np.arange(idxs.size), n_steps - 1]
+
+        rewards = self._rewards[positions]
+        if self._clip_reward:
+            rewards = np.clip(rewards, -1, 1)
+        rewards = np.sum(rewards * self._gamma ** steps * included, axis=1)
+        ss = self._get_state(last_idxs + 1).astype(np.float32)
+
+        return rewards, ss, self._absorbing[last_idxs],\
+            self._last[last_idxs], n_steps
+
     def _get_state(self, idxs):
-        s = np.empty((idxs.size,) + self._states.shape[1:] + (
-            self._history_length,), dtype=np.float32)
-        for j, idx in enumerate(idxs):
-            if idx >= self._history_length - 1:
-                for k in xrange(self._history_length):
-                    s[j, ..., self._history_length - 1 - k] = self._states[
-                        idx - k, ...]
-            else:
-                indexes = [(idx - i) % self.size for i in
-                           reversed(range(self._history_length))]
-                for k, index in enumerate(indexes):
-                    s[j, ..., k] = self._states[index, ...]
+        """
+        Stack the last `history_length` states of each index with a single
+        gather from the circular buffer of states.
+
+        Args:
+            idxs (np.ndarray): the indexes of the most recent state of each
+                stack.
+
+        Returns:
+            The array of stacked states, with the history along the last axis.
 
-        return s
+        """
+        history = np.arange(-self._history_length + 1, 1)
+        history_idxs = (idxs.reshape(-1, 1) + history) % self.size
+
+        s = self._states[history_idxs]
+
+        return np.rollaxis(s, 1, s.ndim)
 
     def reset(self):
         self._idx = 0
         self._full = False
-        self._states = np.ones(self._observation_shape, dtype=np.float32)
-        self._actions = np.ones(self._action_shape, dtype=np.float32)
-        self._rewards = np.ones(self._max_size, dtype=np.float32)
-        self._absorbing = np.ones(self._max_size, dtype=np.bool)
-        self._last = np.ones(self._max_size, dtype=np.bool)
+        self._states = self._allocate('states', self._observation_shape,
+                                      self._observation_type)
+        self._actions = self._allocate('actions', self._action_shape,
+                                       self._action_type)
+        self._rewards = self._allocate('rewards', (self._max_size,),
+                                       np.float32)
+        self._absorbing = self._allocate('absorbing', (self._max_size,),
+                                         np.bool)
+        self._last = self._allocate('last', (self._max_size,), np.bool)
+
+    def _allocate(self, name, shape, dtype):
+        """
+        Allocate one of the arrays of the memory.
+
+        Args:
+            name (str): the name of the array;
+            shape (tuple): the shape of the array;
+            dtype (np.dtype): the type of the array.
+
+        Returns:
+            The allocated array.
+
+        """
+        return np.ones(shape, dtype=dtype)
 
     @property
     def initialized(self):
@@ -120,3 +270,592 @@ class ReplayMemory(object):
     @property
     def size(self):
         return self._idx if not self._full else self._max_size
+
+
+class MemmapReplayMemory(ReplayMemory):
+    """
+    Replay memory whose arrays are stored in memory-mapped files in a
+    directory. The position of the next sample and whether the memory is full
+    are saved in the same directory by `save`, called every `save_frequency`
+    calls to `add` or on demand, so that a memory created on an existing
+    directory reopens the samples stored up to the last save without copying
+    them. Sampling only reads from disk the rows of the sampled transitions,
+    allowing memories larger than the available RAM.
+
+    """
+    def __init__(self, mdp_info, initial_size, max_size, path,
+                 history_length=1, n_step=1, clip_reward=False,
+                 save_frequency=None):
+        """
+        Constructor.
+
+        Args:
+            mdp_info (MDPInfo): information about the MDP;
+            initial_size (int): number of samples needed to consider the
+                memory initialized;
+            max_size (int): maximum number of samples in the memory;
+            path (str): the directory where the memory is stored. If it
+                already contains a memory, it is reopened;
+            history_length (int, 1): number of consecutive states composing a
+                state returned by the memory;
+            n_step (int, 1): number of steps of the returns provided by the
+                memory;
+            clip_reward (bool, False): whether to clip in [-1, 1] each reward
+                summed in the n-step returns;
+            save_frequency (int, None): number of calls to `add` between each
+                save of the memory. If None, the memory is only saved when
+                `save` is called.
+
+        """
+        self._path = path
+        self._save_frequency = save_frequency
+        self._n_adds = 0
+        mk_dir_recursive(self._path)
+        self._restore = os.path.isfile(self._metadata_path)
+
+        super(MemmapReplayMemory, self).__init__(mdp_info, initial_size,
+                                                 max_size, history_length,
+                                                 n_step, clip_reward)
+
+    def add(self, dataset):
+        super(MemmapReplayMemory, self).add(dataset)
+
+        self._n_adds += 1
+        if self._save_frequency is not None\
+                and self._n_adds % self._save_frequency == 0:
+            self.save()
+
+    def reset(self):
+        """
+        Reset the memory, discarding the stored samples. When called by the
+        constructor on a directory containing a memory, the stored samples
+        and metadata are reopened instead.
+
+        """
+        super(MemmapReplayMemory, self).reset()
+
+        if self._restore:
+            with open(self._metadata_path) as f:
+                metadata = json.load(f)
+            if metadata['max_size'] != self._max_size:
+                raise ValueError('The stored memory has a different size.')
+            self._idx = metadata['idx']
+            self._full = metadata['full']
+            self._restore = False
+        else:
+            self.save()
+
+    def save(self):
+        """
+        Write to disk the arrays and the metadata of the memory. The metadata
+        is replaced atomically after the arrays are flushed, so that it never
+        refers to samples not written to disk.
+
+        """
+        self.flush()
+        tmp_path = self._metadata_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(idx=int(self._idx), full=bool(self._full),
+                           max_size=self._max_size), f)
+        os.rename(tmp_path, self._metadata_path)
+
+    def flush(self):
+        """
+        Write to disk the changes to the arrays of the memory.
+
+        """
+        for a in [self._states, self._actions, self._rewards, self._absorbing,
+                  self._last]:
+            a.flush()
+
+    def _allocate(self, name, shape, dtype):
+        mode = 'r+' if self._restore else 'w+'
+
+        return np.memmap(os.path.join(self._path, name + '.dat'), dtype=dtype,
+                         mode=mode, shape=shape)
+
+    @property
+    def _metadata_path(self):
+        return os.path.join(self._path, 'metadata.json')
+
+
+class SharedReplayMemory(ReplayMemory):
+    """
+    Replay memory whose arrays and metadata are stored in shared memory, so
+    that it can be written and sampled by several processes forked after its
+    creation, e.g. actor processes collecting transitions for a learner.
+    Adding and sampling are serialized by a process-shared lock. The memory
+    must not be reset after the processes have been started, as the new
+    arrays would not be shared.
+
+    The memory can be split in contiguous segments, each one managed as a
+    memory of its own, so that the transitions written by different
+    processes are never used as the next states or as the history of each
+    other. The transitions are sampled uniformly over all the segments.
+
+    """
+    def __init__(self, mdp_info, initial_size, max_size, history_length=1,
+                 n_step=1, clip_reward=False, n_segments=1):
+        """
+        Constructor.
+
+        Args:
+            mdp_info (MDPInfo): information about the MDP;
+            initial_size (int): number of samples needed to consider the
+                memory initialized;
+            max_size (int): maximum number of samples in the memory, split
+                evenly among the segments;
+            history_length (int, 1): number of consecutive states composing a
+                state returned by the memory;
+            n_step (int, 1): number of steps of the returns provided by the
+                memory;
+            clip_reward (bool, False): whether to clip in [-1, 1] each reward
+                summed in the n-step returns;
+            n_segments (int, 1): number of segments of the memory.
+
+        """
+        self._n_segments = n_segments
+        self._segment = 0
+        self._arrays = dict()
+        self._shared_idx = mp.RawArray(ctypes.c_long, n_segments)
+        self._shared_full = mp.RawArray(ctypes.c_bool, n_segments)
+        self._lock = mp.Lock()
+
+        super(SharedReplayMemory, self).__init__(mdp_info, initial_size,
+                                                 max_size // n_segments,
+                                                 history_length, n_step,
+                                                 clip_reward)
+
+    def add(self, dataset, segment=0):
+        """
+        Add the samples to a segment of the memory.
+
+        Args:
+            dataset ([list, Dataset]): the samples to add;
+            segment (int, 0): the index of the segment.
+
+        """
+        with self._lock:
+            self._select(segment)
+            super(SharedReplayMemory, self).add(dataset)
+
+    def get(self, n_samples, random_state=np.random):
+        with self._lock:
+            if self._n_segments == 1:
+                return super(SharedReplayMemory, self).get(n_samples,
+                                                           random_state)
+
+            # The most recent transition of each segment is not sampled.
+            sizes = np.maximum(self._segment_sizes() - 1, 0)
+            counts = random_state.multinomial(n_samples,
+                                              sizes / float(np.sum(sizes)))
+            batches = list()
+            for segment in np.flatnonzero(counts):
+                self._select(segment)
+                batches.append(super(SharedReplayMemory, self).get(
+                    counts[segment], random_state))
+
+            return tuple(np.concatenate(b) for b in zip(*batches))
+
+    def reset(self):
+        self._select(0)
+        super(SharedReplayMemory, self).reset()
+
+        self._shared_idx[:] = [0] * self._n_segments
+        self._shared_full[:] = [False] * self._n_segments
+
+    def _select(self, segment):
+        """
+        Make the arrays and the metadata of the memory refer to a segment.
+
+        Args:
+            segment (int): the index of the segment.
+
+        """
+        self._segment = segment
+        for name, array in self._arrays.items():
+            setattr(self, '_' + name, array[segment * self._max_size:
+                                            (segment + 1) * self._max_size])
+
+    def _segment_sizes(self):
+        return np.array([self._max_size if self._shared_full[i]
+                         else self._shared_idx[i]
+                         for i in xrange(self._n_segments)])
+
+    def _allocate(self, name, shape, dtype):
+        shape = (shape[0] * self._n_segments,) + shape[1:]
+        dtype = np.dtype(dtype)
+        n_bytes = int(np.prod(shape)) * dtype.itemsize
+        buf = mp.RawArray(ctypes.c_char, max(n_bytes, 1))
+
+        self._arrays[name] = np.frombuffer(
+            buf, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+        return self._arrays[name][:self._max_size]
+
+    @property
+    def initialized(self):
+        return np.sum(self._segment_sizes()) > self._initial_size
+
+    @property
+    def n_segments(self):
+        """
+        Returns:
+             the number of segments of the memory.
+
+        """
+        return self._n_segments
+
+    @property
+    def _idx(self):
+        return self._shared_idx[self._segment]
+
+    @_idx.setter
+    def _idx(self, value):
+        self._shared_idx[self._segment] = value
+
+    @property
+    def _full(self):
+        return self._shared_full[self._segment]
+
+    @_full.setter
+    def _full(self, value):
+        self._shared_full[self._segment] = value
+
+
+class SumTree(object):
+    """
+    Array-backed binary tree where each internal node stores the sum of the
+    values of its children. It is used to sample indexes proportionally to
+    their values in logarithmic time. All the operations are vectorized over
+    a batch of indexes.
+
+    """
+    def __init__(self, max_size):
+        """
+        Constructor.
+
+        Args:
+            max_size (int): the number of leaves of the tree.
+
+        """
+        self._depth = int(np.ceil(np.log2(max(max_size, 1))))
+        self._n_leaves = 2 ** self._depth
+        self._tree = np.zeros(2 * self._n_leaves - 1)
+
+    def update(self, idxs, values):
+        """
+        Set the values of the leaves and update the sums of their ancestors.
+
+        Args:
+            idxs (np.ndarray): the indexes of the leaves to update;
+            values (np.ndarray): the new values of the leaves.
+
+        """
+        tree_idxs = idxs + self._n_leaves - 1
+        self._tree[tree_idxs] = values
+
+        for _ in xrange(self._depth):
+            tree_idxs = np.unique((tree_idxs - 1) // 2)
+            self._tree[tree_idxs] = self._tree[2 * tree_idxs + 1] +\
+                self._tree[2 * tree_idxs + 2]
+
+    def get(self, values):
+        """
+        Find, for each value, the leaf where the cumulative sum of the leaves
+        exceeds the value.
+
+        Args:
+            values (np.ndarray): the values to search, in [0, `total`).
+
+        Returns:
+            The indexes of the leaves found.
+
+        """
+        tree_idxs = np.zeros(values.size, dtype=np.int)
+        values = np.array(values, dtype=np.float)
+
+        for _ in xrange(self._depth):
+            left = 2 * tree_idxs + 1
+            left_values = self._tree[left]
+            right = values >= left_values
+
+            values -= left_values * right
+            tree_idxs = left + right
+
+        return tree_idxs - self._n_leaves + 1
+
+    def leaves(self, idxs):
+        """
+        Args:
+            idxs (np.ndarray): the indexes of the leaves.
+
+        Returns:
+            The values of the leaves.
+
+        """
+        return self._tree[idxs + self._n_leaves - 1]
+
+    def reset(self):
+        self._tree[:] = 0.
+
+    @property
+    def total(self):
+        """
+        Returns:
+             the sum of the values of all the leaves.
+
+        """
+        return self._tree[0]
+
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """
+    This class implements function to manage a prioritized replay memory as
+    the one used in "Prioritized Experience Replay" by Schaul T. et al.. The
+    probability of sampling each transition is proportional to its priority,
+    stored in a sum-tree.
+
+    """
+    def __init__(self, mdp_info, initial_size, max_size, history_length=1,
+                 n_step=1, clip_reward=False, alpha=.6, beta=None,
+                 epsilon=1e-6):
+        """
+        Constructor.
+
+        Args:
+            mdp_info (MDPInfo): information about the MDP;
+            initial_size (int): number of samples needed to consider the
+                memory initialized;
+            max_size (int): maximum number of samples in the memory;
+            history_length (int, 1): number of consecutive states composing a
+                state returned by the memory;
+            n_step (int, 1): number of steps of the returns provided by the
+                memory;
+            clip_reward (bool, False): whether to clip in [-1, 1] each reward
+                summed in the n-step returns;
+            alpha (float, .6): exponent applied to the absolute TD errors to
+                compute the priorities;
+            beta ([float, Parameter], None): exponent of the importance
+                sampling weights. If None, a constant value of .4 is used;
+            epsilon (float, 1e-6): value added to the absolute TD errors to
+                avoid zero priorities.
+
+        """
+        self._alpha = alpha
+        if beta is None:
+            beta = Parameter(.4)
+        elif not isinstance(beta, Parameter):
+            beta = Parameter(beta)
+        self._beta = beta
+        self._epsilon = epsilon
+
+        self._tree = SumTree(max_size)
+        self._max_priority = 1.
+
+        super(PrioritizedReplayMemory, self).__init__(
+            mdp_info, initial_size, max_size, history_length, n_step,
+            clip_reward)
+
+    def add(self, dataset):
+        """
+        Add the samples with the maximum priority. The next state of the most
+        recent transition is the state of the following sample, not written
+        yet, so the transition has no priority until the next `add`.
+
+        Args:
+            dataset ([list, Dataset]): the samples to add.
+
+        """
+        if len(dataset) == 0:
+            return
+
+        if self.size > 0:
+            newest = np.array([(self._idx - 1) % self._max_size])
+            self._tree.update(newest, np.ones(1) * self._max_priority)
+
+        idxs, _ = self._insert_idxs(len(dataset))
+        super(PrioritizedReplayMemory, self).add(dataset)
+
+        priorities = np.ones(idxs.size) * self._max_priority
+        priorities[-1] = 0.
+        self._tree.update(idxs, priorities)
+
+    def get(self, n_samples, random_state=np.random):
+        """
+        Sample transitions proportionally to their priorities. The sampling is
+        stratified: a value is drawn uniformly in each of `n_samples` equal
+        segments of the total priority.
+
+        Args:
+            n_samples (int): the number of transitions to sample;
+            random_state (np.random.RandomState, np.random): the random
+                number generator used to sample.
+
+        Returns:
+            The sampled state, action, reward, next_state, absorbing flag and
+            last step flag, as returned by `ReplayMemory.get`, followed by
+            the positions of the transitions, to be used to update their
+            priorities, and by their importance sampling weights.
+
+        """
+        segment = self._tree.total / n_samples
+        values = (np.arange(n_samples) + random_state.uniform(
+            size=n_samples)) * segment
+        idxs = self._tree.get(values)
+        # Rounding errors can reach the leaves without priority, i.e. the
+        # most recent transition and the free positions, which are replaced
+        # by the transition preceding the most recent one.
+        idxs[self._tree.leaves(idxs) == 0.] = (self._idx - 2) % self._max_size
+
+        # The sample in position i is returned by get_idxs(i + 1), which
+        # shifts in place the indexes not available in a partially filled
+        # memory.
+        get_idxs = idxs + 1
+        batch = self.get_idxs(get_idxs)
+        idxs = get_idxs - 1
+
+        p = self._tree.leaves(idxs)
+        weights = (self.size * p / self._tree.total) ** -self._beta()
+        weights /= np.max(weights)
+
+        return batch + (idxs, weights)
+
+    def update(self, idxs, td_error):
+        """
+        Update the priorities of the provided transitions.
+
+        Args:
+            idxs (np.ndarray): the positions of the transitions, as returned by
+                `get`;
+            td_error (np.ndarray): the TD errors of the transitions.
+
+        """
+        priorities = (np.abs(td_error) + self._epsilon) ** self._alpha
+        self._tree.update(idxs, priorities)
+
+        self._max_priority = max(self._max_priority, np.max(priorities))
+
+    def reset(self):
+        super(PrioritizedReplayMemory, self).reset()
+
+        self._tree.reset()
+        self._max_priority = 1.
+
+
+class PrefetchReplayMemory(object):
+    """
+    Wrapper of a replay memory that prepares the next batches on a background
+    thread, so that sampling and stacking the states overlap with the
+    training of the approximator. Batches are put in a bounded queue and the
+    wrapped memory is accessed under a lock, so that a batch never mixes
+    samples written before and after a concurrent `add`. A batch can contain
+    only the samples added before it was prepared. The batches are sampled
+    with a random number generator seeded, at construction, from the global
+    numpy one, so that sampling does not change the random sequence of the
+    rest of the experiment. The other attributes are forwarded to the wrapped
+    memory.
+
+    """
+    def __init__(self, replay_memory, n_batches):
+        """
+        Constructor.
+
+        Args:
+            replay_memory (ReplayMemory): the memory to sample from;
+            n_batches (int): the maximum number of batches prepared in
+                advance.
+
+        """
+        self._replay_memory = replay_memory
+        self._n_batches = n_batches
+
+        self._random_state = np.random.RandomState(
+            np.random.randint(np.iinfo(np.int32).max))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._queue = None
+        self._stop = None
+        self._batch_size = None
+
+    def add(self, dataset):
+        with self._lock:
+            self._replay_memory.add(dataset)
+
+    def get(self, n_samples):
+        """
+        Get the next prepared batch. The background thread is started by the
+        first call and prepares batches of `n_samples` transitions; batches of
+        a different size are sampled on the calling thread.
+
+        Args:
+            n_samples (int): the number of transitions to sample.
+
+        Returns:
+            The batch returned by the `get` method of the wrapped memory.
+
+        """
+        if self._thread is None:
+            self._start(n_samples)
+        elif n_samples != self._batch_size:
+            with self._lock:
+                return self._replay_memory.get(n_samples, self._random_state)
+
+        batch = self._queue.get()
+        if isinstance(batch, Exception):
+            self._thread = None
+            raise batch
+
+        return batch
+
+    def update(self, *args):
+        with self._lock:
+            self._replay_memory.update(*args)
+
+    def reset(self):
+        self.stop()
+        with self._lock:
+            self._replay_memory.reset()
+
+    def stop(self):
+        """
+        Stop the background thread, discarding the prepared batches.
+
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _start(self, batch_size):
+        self._batch_size = batch_size
+        self._queue = Queue(maxsize=self._n_batches)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _prefetch(self):
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    batch = self._replay_memory.get(self._batch_size,
+                                                    self._random_state)
+            except Exception as e:
+                batch = e
+
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(batch, timeout=.1)
+                    break
+                except Full:
+                    pass
+
+            if isinstance(batch, Exception):
+                return
+
+    def __getattr__(self, name):
+        if name == '_replay_memory':
+            raise AttributeError(name)
+
+        return getattr(self._replay_memory, name)
@@ -7,7 +7,7 @@ class Box:
     spaces. It is similar to the Box class in gym.spaces.box.
 
     """
-    def __init__(self, low, high, shape=None):
+    def __init__(self, low, high, shape=None, dtype=np.float32):
         """
         Constructor.
 
@@ -23,9 +23,13 @@ class Box:
                 provided, each i-th element is considered the maximum value
                 of the i-th dimension;
             shape (np.ndarray, None): the dimension of the space. Must match
-                the shape of `low` and `high`, if they are np.ndarray.
+                the shape of `low` and `high`, if they are np.ndarray;
+            dtype (np.dtype, np.float32): the type used to store the elements
+                of the space (e.g. np.uint8 for pixel observations).
 
         """
+        self._dtype = np.dtype(dtype)
+
         if shape is None:
             self._low = low
             self._high = high
@@ -52,6 +56,10 @@ class Box:
     def shape(self):
         return self._shape
 
+    @property
+    def dtype(self):
+        return self._dtype
+
 
 class Discrete:
     """
@@ -77,3 +85,13 @@ class Discrete:
     @property
     def shape(self):
         return 1,
+
+    @property
+    def dtype(self):
+        """
+        Returns:
+            The smallest unsigned integer type able to store the index of
+            each value of the space.
+
+        """
+        return np.min_scalar_type(self.n - 1)
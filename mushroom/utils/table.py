@@ -24,18 +24,36 @@ class Table:
         if self.table.size == 1:
             return self.table[0]
         else:
-            idx = tuple([
-                a[0] if isinstance(a, np.ndarray) else a for a in args])
-
-            return self.table[idx]
+            return self.table[self._index(args)]
 
     def __setitem__(self, args, value):
         if self.table.size == 1:
             self.table[0] = value
         else:
-            idx = tuple([
-                a[0] if isinstance(a, np.ndarray) else a for a in args])
-            self.table[idx] = value
+            self.table[self._index(args)] = value
+
+    @staticmethod
+    def _index(args):
+        """
+        Args:
+            args (tuple): the indexes of the entries. Each np.ndarray provides
+                one index for each of its components (e.g. a state made of
+                several discrete variables), or, if it has two dimensions,
+                the indexes of a batch of entries, stacked along the first
+                axis.
+
+        Returns:
+            The index of the table.
+
+        """
+        idx = list()
+        for a in args:
+            if isinstance(a, np.ndarray):
+                idx.extend(a.T)
+            else:
+                idx.append(a)
+
+        return tuple(idx)
 
     def fit(self, x, y):
         self[x] = y
@@ -45,6 +63,11 @@ class Table:
             z = [np.expand_dims(z_i, axis=0) for z_i in z]
         state = z[0]
 
+        if self.table.size > 1:
+            values = self[tuple(z) + ((slice(None),) if len(z) == 1 else ())]
+
+            return values[0] if len(values) == 1 else values
+
         values = list()
         if len(z) == 2:
             action = z[1]
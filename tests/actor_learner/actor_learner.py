@@ -0,0 +1,134 @@
+import numpy as np
+
+from mushroom.algorithms.value import DQN
+from mushroom.core.core import ActorLearner
+from mushroom.environments import GridWorld, MDPInfo
+from mushroom.policy import EpsGreedy
+from mushroom.utils.parameters import Parameter
+from mushroom.utils.replay_memory import SharedReplayMemory
+from mushroom.utils.spaces import Box, Discrete
+
+
+class TableModel(object):
+    """
+    Tabular model of the Q-function of a grid world, fitted with a step
+    towards the targets.
+
+    """
+    def __init__(self, input_shape, output_shape, n_states, **params):
+        self._table = np.zeros((n_states,) + output_shape)
+
+    def fit(self, state, action, q, **fit_params):
+        idxs = (state[:, 0, -1].astype(np.int), action.ravel())
+        np.add.at(self._table, idxs, .5 * (q - self._table[idxs]))
+
+    def predict(self, state, **predict_params):
+        return self._table[state[:, 0, -1].astype(np.int)]
+
+    def get_weights(self):
+        return self._table.copy()
+
+    def set_weights(self, w):
+        self._table[:] = w
+
+
+def build_mdp():
+    return GridWorld(height=3, width=3, goal=(2, 2))
+
+
+def build_agent(mdp_info, replay_memory):
+    pi = EpsGreedy(epsilon=Parameter(.5))
+
+    approximator_params = dict(input_shape=(1, 1),
+                               output_shape=(mdp_info.action_space.n,),
+                               n_actions=mdp_info.action_space.n,
+                               n_states=mdp_info.observation_space.n)
+    algorithm_params = dict(batch_size=10, initial_replay_size=50,
+                            max_replay_size=None, target_update_frequency=10,
+                            max_no_op_actions=1, replay_memory=replay_memory,
+                            clip_reward=False)
+    agent_params = {'approximator_params': approximator_params,
+                    'algorithm_params': algorithm_params,
+                    'fit_params': dict()}
+
+    return DQN(TableModel, pi, mdp_info, agent_params)
+
+
+def build_failing_agent(mdp_info, replay_memory):
+    agent = build_agent(mdp_info, replay_memory)
+
+    def episode_start():
+        raise RuntimeError('Failing actor.')
+    agent.episode_start = episode_start
+
+    return agent
+
+
+def test_segments():
+    mdp_info = MDPInfo(Box(0, 1000, (1,)), Discrete(2), .9, 100)
+    memory = SharedReplayMemory(mdp_info, 5, 30, n_segments=3)
+
+    for segment, n_samples in [(0, 4), (1, 12)]:
+        states = 100 * segment + np.arange(n_samples)
+        memory.add([(np.array([s]), np.array([0]), 0., np.array([s + 1]),
+                     False, False) for s in states], segment)
+
+    assert memory.n_segments == 3
+    assert np.array_equal(memory._segment_sizes(), [4, 10, 0])
+    assert memory.initialized
+
+    # The transitions are sampled uniformly over the segments, without the
+    # most recent transition of each segment
+    state, _, _, next_state, _, _ = memory.get(6000)
+    state = state[:, 0, 0]
+    assert np.array_equal(next_state[:, 0, 0], state + 1)
+    assert np.array_equal(np.unique(state),
+                          np.concatenate((np.arange(3),
+                                          100 + np.arange(2, 11))))
+    assert np.isclose(np.mean(state < 100), 3. / 12, atol=.02)
+
+
+def test_actor_learner():
+    mdp = build_mdp()
+    memory = SharedReplayMemory(mdp.info, 50, 1000, n_segments=2)
+    agent = build_agent(mdp.info, memory)
+
+    actor_learner = ActorLearner(agent, memory, build_agent, build_mdp, 2,
+                                 n_steps_per_add=10, weights_frequency=5)
+    actor_learner.learn(n_fits=20, quiet=True)
+    actor_learner.stop()
+
+    assert agent._n_updates == 20
+    assert np.all(memory._segment_sizes() > 0)
+
+    try:
+        ActorLearner(agent, memory, build_agent, build_mdp, 3)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_failing_actors():
+    mdp = build_mdp()
+    memory = SharedReplayMemory(mdp.info, 50, 1000, n_segments=2)
+    agent = build_agent(mdp.info, memory)
+
+    actor_learner = ActorLearner(agent, memory, build_failing_agent,
+                                 build_mdp, 2)
+    try:
+        actor_learner.learn(n_fits=20, quiet=True)
+    except RuntimeError:
+        pass
+    else:
+        assert False
+
+
+if __name__ == '__main__':
+    print('Executing actor_learner test...')
+
+    np.random.seed(1)
+
+    test_segments()
+    test_actor_learner()
+    test_failing_actors()
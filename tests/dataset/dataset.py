@@ -0,0 +1,67 @@
+import numpy as np
+
+from mushroom.utils.dataset import Dataset, parse_dataset
+
+
+def build_samples(n_samples):
+    samples = list()
+    for i in xrange(n_samples):
+        state = np.random.uniform(size=2)
+        action = np.random.randint(3, size=1)
+        reward = np.random.uniform()
+        next_state = np.random.uniform(size=2)
+        absorbing = np.random.uniform() < .1
+        last = absorbing or np.random.uniform() < .2
+
+        samples.append((state, action, reward, next_state, absorbing, last))
+
+    return samples
+
+
+def assert_equal(dataset, samples):
+    assert len(dataset) == len(samples)
+    for x, y in zip(dataset.parse(), parse_dataset(samples)):
+        assert np.array_equal(x, y)
+    for sample, other in zip(dataset, samples):
+        for x, y in zip(sample, other):
+            assert np.array_equal(x, y)
+
+    last = np.array([s[5] for s in samples], dtype=np.bool)
+    assert np.array_equal(dataset.episode_ends, np.flatnonzero(last))
+
+
+if __name__ == '__main__':
+    print('Executing dataset test...')
+
+    np.random.seed(1)
+
+    samples = build_samples(50)
+
+    # Growth when appending one sample at a time
+    dataset = Dataset(capacity=1)
+    for s in samples:
+        dataset.append(s)
+    assert dataset._capacity >= len(samples)
+    assert_equal(dataset, samples)
+
+    # Growth when extending with lists and datasets
+    dataset = Dataset(capacity=4)
+    dataset.extend(samples[:3])
+    dataset.extend(Dataset.from_list(samples[3:30]))
+    dataset += samples[30:]
+    assert_equal(dataset, samples)
+
+    assert_equal(Dataset.from_list(samples[:20]) + samples[20:], samples)
+
+    # Indexing
+    assert np.array_equal(dataset[-1][0], samples[-1][0])
+    try:
+        dataset[len(samples)]
+    except IndexError:
+        pass
+    else:
+        assert False
+
+    assert_equal(dataset[10:20], samples[10:20])
+    idxs = np.array([3, 7, 11, 40])
+    assert_equal(dataset[idxs], [samples[i] for i in idxs])
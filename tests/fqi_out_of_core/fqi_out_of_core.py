@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor
+from sklearn.linear_model import SGDRegressor
+
+from mushroom.algorithms.value import FQI, DoubleFQI
+from mushroom.environments import CarOnHill
+from mushroom.policy import EpsGreedy
+from mushroom.utils.dataset import Dataset, HDF5Dataset, parse_dataset
+from mushroom.utils.parameters import Parameter
+
+
+def build_dataset(n_samples):
+    dataset = list()
+    for i in xrange(n_samples):
+        state = np.random.uniform(-1., 1., size=2)
+        action = np.random.randint(3, size=1)
+        reward = np.random.uniform()
+        next_state = np.random.uniform(-1., 1., size=2)
+        absorbing = np.random.uniform() < .1
+        last = absorbing or np.random.uniform() < .05
+
+        dataset.append((state, action, reward, next_state, absorbing, last))
+
+    return dataset
+
+
+def build_agent(algorithm_class, approximator, boosted=False):
+    mdp = CarOnHill()
+
+    pi = EpsGreedy(epsilon=Parameter(1.))
+
+    approximator_params = dict(input_shape=mdp.info.observation_space.shape,
+                               n_actions=mdp.info.action_space.n)
+    algorithm_params = dict(n_iterations=1, chunk_size=7, boosted=boosted,
+                            quiet=True)
+    agent_params = {'approximator_params': approximator_params,
+                    'algorithm_params': algorithm_params,
+                    'fit_params': dict()}
+
+    return algorithm_class(approximator, pi, mdp.info, agent_params)
+
+
+def test_round_trip(path, dataset):
+    hdf5_dataset = HDF5Dataset(path, mode='w')
+    hdf5_dataset.extend(dataset[:10])
+    hdf5_dataset.extend(Dataset.from_list(dataset[10:]))
+    hdf5_dataset.close()
+
+    hdf5_dataset = HDF5Dataset(path, mode='r')
+    assert len(hdf5_dataset) == len(dataset)
+    for x, y in zip(parse_dataset(dataset),
+                    [hdf5_dataset.state, hdf5_dataset.action,
+                     hdf5_dataset.reward, hdf5_dataset.next_state,
+                     hdf5_dataset.absorbing, hdf5_dataset.last]):
+        assert np.array_equal(x, y[:])
+
+    chunks = hdf5_dataset.chunks(7)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(dataset)
+    for (start, stop), (next_start, _) in zip(chunks[:-1], chunks[1:]):
+        assert stop == next_start
+    assert all([0 < stop - start <= 7 for start, stop in chunks])
+
+    return hdf5_dataset
+
+
+def test_chunked_targets(hdf5_dataset, dataset):
+    agent = build_agent(FQI, SGDRegressor)
+    agent.fit(hdf5_dataset)
+    assert np.array_equal(agent._target, parse_dataset(dataset)[2])
+
+    _, _, reward, next_state, absorbing, _ = parse_dataset(dataset)
+    q = agent.approximator.predict(next_state) * (
+        1 - absorbing.reshape(-1, 1))
+    target = reward + agent.mdp_info.gamma * np.max(q, axis=1)
+
+    agent.fit(hdf5_dataset)
+    assert np.allclose(agent._target, target)
+
+
+def test_invalid_models(hdf5_dataset):
+    for algorithm_class, approximator, boosted in [
+            (FQI, ExtraTreesRegressor, False), (FQI, SGDRegressor, True),
+            (DoubleFQI, SGDRegressor, False)]:
+        agent = build_agent(algorithm_class, approximator, boosted)
+        try:
+            agent.fit(hdf5_dataset)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+
+if __name__ == '__main__':
+    print('Executing fqi_out_of_core test...')
+
+    np.random.seed(1)
+
+    folder = tempfile.mkdtemp()
+    try:
+        dataset = build_dataset(100)
+        hdf5_dataset = test_round_trip(os.path.join(folder, 'dataset.h5'),
+                                       dataset)
+
+        test_chunked_targets(hdf5_dataset, dataset)
+        test_invalid_models(hdf5_dataset)
+
+        hdf5_dataset.close()
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+
+import numpy as np
+
+from mushroom.environments import MDPInfo
+from mushroom.utils.replay_memory import MemmapReplayMemory
+from mushroom.utils.spaces import Box, Discrete
+
+
+def build_dataset(start, n_samples):
+    return [(np.array([i]), np.array([i % 2]), float(i), np.array([i + 1]),
+             i % 5 == 4, i % 5 == 4) for i in xrange(start, start + n_samples)]
+
+
+def assert_equal_memories(memory, other):
+    assert memory._idx == other._idx and memory._full == other._full
+    for name in ['_states', '_actions', '_rewards', '_absorbing', '_last']:
+        x = getattr(memory, name)[:memory.size]
+        y = getattr(other, name)[:other.size]
+        assert np.array_equal(x, y)
+
+
+def test_reopen(path):
+    mdp_info = MDPInfo(Box(0, 100, (1,)), Discrete(2), .9, 100)
+    memory = MemmapReplayMemory(mdp_info, 1, 8, path)
+
+    # The samples are only stored when the memory is saved
+    memory.add(build_dataset(0, 5))
+    reopened = MemmapReplayMemory(mdp_info, 1, 8, path)
+    assert reopened._idx == 0 and not reopened._full
+
+    memory.save()
+    reopened = MemmapReplayMemory(mdp_info, 1, 8, path)
+    assert reopened._idx == 5 and not reopened._full
+    assert_equal_memories(memory, reopened)
+
+    # Full memory
+    memory.add(build_dataset(5, 6))
+    memory.save()
+    reopened = MemmapReplayMemory(mdp_info, 1, 8, path)
+    assert reopened._idx == 3 and reopened._full
+    assert_equal_memories(memory, reopened)
+
+    idxs = np.arange(1, 8)
+    for x, y in zip(memory.get_idxs(idxs.copy()),
+                    reopened.get_idxs(idxs.copy())):
+        assert np.array_equal(x, y)
+
+    try:
+        MemmapReplayMemory(mdp_info, 1, 16, path)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_save_frequency(path):
+    mdp_info = MDPInfo(Box(0, 100, (1,)), Discrete(2), .9, 100)
+    memory = MemmapReplayMemory(mdp_info, 1, 8, path, save_frequency=2)
+
+    memory.add(build_dataset(0, 2))
+    assert MemmapReplayMemory(mdp_info, 1, 8, path)._idx == 0
+    memory.add(build_dataset(2, 1))
+    reopened = MemmapReplayMemory(mdp_info, 1, 8, path)
+    assert_equal_memories(memory, reopened)
+
+
+if __name__ == '__main__':
+    print('Executing memmap_replay test...')
+
+    for test in [test_reopen, test_save_frequency]:
+        folder = tempfile.mkdtemp()
+        try:
+            test(folder)
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from mushroom.environments import MDPInfo
+from mushroom.utils.replay_memory import ReplayMemory
+from mushroom.utils.spaces import Box, Discrete
+
+
+def n_step_return(samples, i, n_step, gamma, newest):
+    """
+    Reference n-step return of the transition i, computed sample by sample.
+
+    """
+    reward = 0.
+    n = 0
+    while True:
+        _, _, r, _, absorbing, last = samples[i + n]
+        reward += gamma ** n * np.clip(r, -1, 1)
+        n += 1
+        if n == n_step or absorbing or last or i + n == newest:
+            break
+
+    _, _, _, next_state, absorbing, last = samples[i + n - 1]
+
+    return reward, next_state, absorbing, last, n
+
+
+def assert_n_step_return(batch, k, samples, i, n_step, gamma, newest):
+    state, _, reward, next_state, absorbing, last, n = batch
+
+    r, ss, ab, l, n_ref = n_step_return(samples, i, n_step, gamma, newest)
+    assert state[k, 0, 0] == i
+    assert np.isclose(reward[k], r)
+    assert next_state[k, 0, 0] == ss[0]
+    assert absorbing[k] == ab and last[k] == l and n[k] == n_ref
+
+
+def test_n_step(max_size, n_step, gamma):
+    mdp_info = MDPInfo(Box(0, 100, (1,)), Discrete(2), gamma, 100)
+    memory = ReplayMemory(mdp_info, 1, max_size, n_step=n_step,
+                          clip_reward=True)
+
+    # Two complete episodes, the first one ending in an absorbing state, and
+    # one episode still running
+    rows = [(2., False, False), (1., False, False), (.5, False, False),
+            (-3., True, True), (-.5, False, False), (1., False, False),
+            (4., False, True), (1., False, False), (.25, False, False),
+            (1., False, False)]
+    samples = [(np.array([i]), np.array([0]), r, np.array([i + 1]),
+                absorbing, last)
+               for i, (r, absorbing, last) in enumerate(rows)]
+    memory.add(samples)
+
+    newest = len(samples) - 1
+    oldest = max(0, len(samples) - max_size)
+    for i in xrange(oldest, newest):
+        batch = memory.get_idxs(np.array([i % max_size + 1]))
+        assert_n_step_return(batch, 0, samples, i, n_step, gamma, newest)
+
+    # The most recent transition is never sampled, also when the memory is
+    # full
+    batch = memory.get(1000)
+    states = batch[0][:, 0, 0].astype(np.int)
+    assert np.all(states >= oldest) and np.all(states < newest)
+    assert np.unique(states).size == newest - oldest
+    for k, i in enumerate(states):
+        assert_n_step_return(batch, k, samples, i, n_step, gamma, newest)
+
+
+if __name__ == '__main__':
+    print('Executing n_step_replay test...')
+
+    np.random.seed(1)
+
+    for max_size in [20, 7]:
+        for n_step in [2, 3, 5]:
+            test_n_step(max_size, n_step, .5)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from mushroom.environments import MDPInfo
+from mushroom.utils.replay_memory import PrioritizedReplayMemory, SumTree
+from mushroom.utils.spaces import Box, Discrete
+
+
+def test_sum_tree(max_size):
+    tree = SumTree(max_size)
+    values = np.zeros(max_size)
+    for _ in xrange(10):
+        idxs = np.random.choice(max_size, size=max_size // 2 + 1,
+                                replace=False)
+        values[idxs] = np.random.uniform(size=idxs.size)
+        tree.update(idxs, values[idxs])
+
+        assert np.isclose(tree.total, np.sum(values))
+        assert np.array_equal(tree.leaves(np.arange(max_size)), values)
+
+    # A uniform grid of values hits each leaf proportionally to its value
+    n_values = 100000
+    grid = (np.arange(n_values) + .5) * tree.total / n_values
+    counts = np.bincount(tree.get(grid), minlength=max_size)
+    assert counts.size == max_size
+    assert np.allclose(counts / float(n_values), values / np.sum(values),
+                       atol=2. / n_values)
+
+
+def test_prioritized_replay():
+    mdp_info = MDPInfo(Box(0, 100, (1,)), Discrete(2), .9, 100)
+    memory = PrioritizedReplayMemory(mdp_info, 1, 8)
+
+    dataset = [(np.array([i]), np.array([0]), 1., np.array([i + 1]), False,
+                False) for i in xrange(6)]
+    memory.add(dataset)
+
+    # The most recent transition has no priority until the next add
+    assert memory._tree.leaves(np.array([5]))[0] == 0.
+    idxs = memory.get(1000)[-2]
+    assert np.all(idxs < 5)
+
+    memory.update(np.array([0]), np.array([10.]))
+    memory.add(dataset[:1])
+    priorities = memory._tree.leaves(np.arange(8))
+    assert priorities[5] == memory._max_priority and priorities[6] == 0.
+
+    counts = np.zeros(8)
+    for _ in xrange(200):
+        np.add.at(counts, memory.get(10)[-2], 1)
+    frequencies = counts / np.sum(counts)
+    p = priorities / np.sum(priorities)
+    assert np.allclose(frequencies, p, atol=.02)
+
+
+if __name__ == '__main__':
+    print('Executing prioritized_replay test...')
+
+    np.random.seed(1)
+
+    for max_size in [1, 5, 8, 100]:
+        test_sum_tree(max_size)
+    test_prioritized_replay()
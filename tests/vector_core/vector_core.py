@@ -0,0 +1,73 @@
+import numpy as np
+
+from mushroom.algorithms.value import QLearning, SARSA
+from mushroom.core.core import Core, VectorCore
+from mushroom.environments import GridWorldVanHasselt
+from mushroom.policy import EpsGreedy
+from mushroom.utils.callbacks import CollectDataset
+from mushroom.utils.dataset import compute_J, parse_dataset
+from mushroom.utils.parameters import ExponentialDecayParameter
+
+
+def experiment(algorithm_class, core_class, **core_params):
+    np.random.seed(20)
+
+    # MDP
+    mdp = GridWorldVanHasselt()
+
+    # Policy
+    epsilon = ExponentialDecayParameter(value=1, decay_exp=.5,
+                                        size=mdp.info.observation_space.size)
+    pi = EpsGreedy(epsilon=epsilon)
+
+    # Agent
+    learning_rate = ExponentialDecayParameter(value=1., decay_exp=1.,
+                                              size=mdp.info.size)
+    algorithm_params = dict(learning_rate=learning_rate)
+    agent_params = {'algorithm_params': algorithm_params,
+                    'fit_params': dict()}
+    agent = algorithm_class(pi, mdp.info, agent_params)
+
+    # Algorithm
+    collect_dataset = CollectDataset()
+    core = core_class(agent, mdp, callbacks=[collect_dataset], **core_params)
+
+    # Train
+    core.learn(n_steps=500, n_steps_per_fit=1, quiet=True)
+    dataset = collect_dataset.get()
+
+    # Test
+    test_dataset = core.evaluate(n_steps=50, quiet=True)
+
+    return dataset, test_dataset, agent.Q.table
+
+
+def assert_equal_datasets(dataset, other):
+    assert len(dataset) == len(other)
+    for x, y in zip(parse_dataset(dataset), parse_dataset(other)):
+        assert np.array_equal(x, y)
+
+
+if __name__ == '__main__':
+    print('Executing vector_core test...')
+
+    for a in [QLearning, SARSA]:
+        dataset, test_dataset, Q = experiment(a, Core)
+        vector_dataset, vector_test_dataset, vector_Q = experiment(
+            a, VectorCore, n_envs=1)
+
+        # The last step flags are only set at the end of the episodes
+        assert 0 < np.sum(parse_dataset(dataset)[5]) < len(dataset)
+
+        assert_equal_datasets(dataset, vector_dataset)
+        assert_equal_datasets(test_dataset, vector_test_dataset)
+        assert np.array_equal(compute_J(dataset), compute_J(vector_dataset))
+        assert np.array_equal(Q, vector_Q)
+
+        # With several copies, the episodes only end in the absorbing states,
+        # as the horizon is infinite
+        vector_dataset, vector_test_dataset, _ = experiment(
+            a, VectorCore, n_envs=3)
+        for d in [vector_dataset, vector_test_dataset]:
+            _, _, _, _, absorbing, last = parse_dataset(d)
+            assert np.array_equal(last, absorbing)
@@ -0,0 +1,105 @@
+import numpy as np
+
+from mushroom.algorithms.value import QLearning, SARSA, VectorizedTD
+from mushroom.environments import GridWorld
+from mushroom.policy import EpsGreedy
+from mushroom.policy.td_policy import TDPolicy
+from mushroom.utils.parameters import ExponentialDecayParameter
+
+
+def recording(algorithm_class):
+    """
+    Extend an algorithm to record the batches of transitions of its updates
+    and the next actions chosen by the algorithm.
+
+    """
+    class RecordingAlgorithm(algorithm_class):
+        def __init__(self, policy, mdp_info, params):
+            super(RecordingAlgorithm, self).__init__(policy, mdp_info, params)
+
+            self.transitions = list()
+
+        def update_batch(self, state, action, reward, next_state, absorbing):
+            super(RecordingAlgorithm, self).update_batch(
+                state, action, reward, next_state, absorbing)
+
+            next_action = self.next_action
+            self.transitions.append((
+                state[:, 1:], action, reward.copy(), next_state[:, 1:],
+                absorbing,
+                None if next_action is None else next_action.copy()))
+
+    return RecordingAlgorithm
+
+
+def experiment(algorithm_class, n_runs, n_steps):
+    np.random.seed(20)
+
+    # MDP
+    mdp = GridWorld(height=3, width=3, goal=(2, 2))
+
+    # Policy
+    epsilon = ExponentialDecayParameter(
+        value=1, decay_exp=.5,
+        size=(n_runs,) + mdp.info.observation_space.size)
+    pi = EpsGreedy(epsilon=epsilon)
+
+    # Agent
+    learning_rate = ExponentialDecayParameter(value=1., decay_exp=.8,
+                                              size=(n_runs,) + mdp.info.size)
+    algorithm_params = dict(learning_rate=learning_rate)
+    agent_params = {'algorithm_params': algorithm_params,
+                    'fit_params': dict()}
+    runner = VectorizedTD(recording(algorithm_class), pi, mdp, n_runs,
+                          agent_params)
+
+    # Train
+    runner.learn(n_steps, quiet=True)
+
+    return mdp, runner, runner.agent.transitions
+
+
+class ReplayPolicy(TDPolicy):
+    """
+    Policy returning the recorded next actions of a run, in order.
+
+    """
+    def __init__(self, actions):
+        super(ReplayPolicy, self).__init__()
+
+        self._actions = list(actions)
+
+    def draw_action(self, state):
+        return self._actions.pop(0)
+
+
+def replay(algorithm_class, mdp, transitions, run):
+    next_actions = [t[5][run] for t in transitions if t[5] is not None]
+    pi = ReplayPolicy(next_actions)
+    learning_rate = ExponentialDecayParameter(value=1., decay_exp=.8,
+                                              size=mdp.info.size)
+    algorithm_params = dict(learning_rate=learning_rate)
+    agent_params = {'algorithm_params': algorithm_params,
+                    'fit_params': dict()}
+    agent = algorithm_class(pi, mdp.info, agent_params)
+
+    for s, a, r, ss, ab, _ in transitions:
+        # The action chosen by the algorithm, if any, is executed as in Core
+        if agent.next_action is not None:
+            agent.draw_action(s[run])
+        agent.fit([(s[run], a[run], r[run], ss[run], ab[run], False)])
+
+    return agent.Q.table
+
+
+if __name__ == '__main__':
+    print('Executing vectorized_td test...')
+
+    n_runs = 4
+    for a in [QLearning, SARSA]:
+        mdp, runner, transitions = experiment(a, n_runs, 2000)
+
+        assert np.any([np.any(t[4]) for t in transitions])
+        for run in xrange(n_runs):
+            Q = replay(a, mdp, transitions, run)
+            assert np.allclose(runner.agent.Q.table[run], Q)